@@ -0,0 +1,125 @@
+import heapq
+from array import array
+from typing import Iterator, List, Tuple
+
+from src.data_types.distance_matrix import NO_PREDECESSOR, UNREACHABLE, DistanceMatrix
+from src.data_types.graph import Graph
+
+# Bump whenever a change to the engine could change its output, so cached
+# distance matrices from older versions are rebuilt.
+ALGORITHM_VERSION = 1
+
+# Maps with more than this share of all possible connections are solved with
+# Floyd-Warshall; sparser maps run one Dijkstra per city.
+DENSE_MAP_THRESHOLD = 0.25
+
+
+def all_shortest_lines(city_map: Graph, method: str = "auto") -> DistanceMatrix:
+    """
+    Compute the shortest distance between every pair of cities in one call.
+
+    method: "dijkstra" runs one full single-source search per city, "floyd_warshall"
+    relaxes whole rows at a time and suits dense maps, "auto" picks based on density.
+    """
+    if method == "auto":
+        method = _choose_method(city_map)
+
+    if method == "dijkstra":
+        distances, predecessors = _all_pairs_dijkstra(city_map)
+    elif method == "floyd_warshall":
+        distances, predecessors = _floyd_warshall(city_map)
+    else:
+        raise ValueError(f"Unknown shortest line method: {method}")
+
+    return DistanceMatrix(city_map.cities, distances, predecessors)
+
+
+def _choose_method(graph: Graph) -> str:
+    n = len(graph)
+    if n < 2:
+        return "dijkstra"
+    density = graph.edge_count / (n * (n - 1) / 2)
+    return "floyd_warshall" if density > DENSE_MAP_THRESHOLD else "dijkstra"
+
+
+def single_source_dijkstra(source: int, graph: Graph) -> Tuple[List[int], List[int]]:
+    n = len(graph)
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    dist = [UNREACHABLE] * n
+    prev = [NO_PREDECESSOR] * n
+    dist[source] = 0
+    heap = [(0, source)]
+
+    while heap:
+        current_distance, current = heapq.heappop(heap)
+        if current_distance != dist[current]:
+            continue
+
+        for e in range(offsets[current], offsets[current + 1]):
+            neighbor = neighbors[e]
+            distance_through_current = current_distance + weights[e]
+            if distance_through_current < dist[neighbor]:
+                dist[neighbor] = distance_through_current
+                prev[neighbor] = current
+                heapq.heappush(heap, (distance_through_current, neighbor))
+
+    return dist, prev
+
+
+def stream_shortest_lines(city_map: Graph) -> Iterator[Tuple[int, int, int]]:
+    """
+    Yield (i, j, distance) for every connected pair i < j, one source city at a time,
+    in the order PairTable.pairs() lists them. Only one source's distances are held
+    at once, so the first pairs are out before the rest of the map is searched.
+    """
+    for source in range(len(city_map)):
+        dist, _ = single_source_dijkstra(source, city_map)
+        for j in range(source + 1, len(dist)):
+            if dist[j] != UNREACHABLE:
+                yield source, j, dist[j]
+
+
+def _all_pairs_dijkstra(graph: Graph) -> Tuple[array, array]:
+    distances = array("i")
+    predecessors = array("i")
+    for source in range(len(graph)):
+        dist, prev = single_source_dijkstra(source, graph)
+        distances.extend(dist)
+        predecessors.extend(prev)
+    return distances, predecessors
+
+
+def _floyd_warshall(graph: Graph) -> Tuple[array, array]:
+    n = len(graph)
+    dist = [[UNREACHABLE] * n for _ in range(n)]
+    pred = [[NO_PREDECESSOR] * n for _ in range(n)]
+
+    for i in range(n):
+        dist[i][i] = 0
+    for i, j, distance in graph.edges():
+        if distance < dist[i][j]:
+            dist[i][j] = dist[j][i] = distance
+            pred[i][j] = i
+            pred[j][i] = j
+
+    for k in range(n):
+        row_k = dist[k]
+        pred_k = pred[k]
+        for i in range(n):
+            d_ik = dist[i][k]
+            if d_ik == UNREACHABLE or i == k:
+                continue
+            row_i = dist[i]
+            pred_i = pred[i]
+            # Relax the whole row at once, then write back only the improved entries
+            improved = [j for j, d_kj in enumerate(row_k) if d_ik + d_kj < row_i[j]]
+            for j in improved:
+                row_i[j] = d_ik + row_k[j]
+                pred_i[j] = pred_k[j]
+
+    distances = array("i")
+    predecessors = array("i")
+    for i in range(n):
+        distances.extend(dist[i])
+        predecessors.extend(pred[i])
+    return distances, predecessors
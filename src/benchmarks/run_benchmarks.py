@@ -0,0 +1,335 @@
+"""
+Time the pipeline's hot paths on the US map and on synthetic maps of growing size,
+check the fast all-pairs engines against the reference _dijkstra, and write the
+results as JSON so runs can be compared over time.
+
+    python -m src.benchmarks.run_benchmarks --sizes 500 2000 5000 --output results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.all_shortest_lines import all_shortest_lines
+from src.benchmarks.synthetic_map import SYNTHETIC_BOUNDS, synthetic_map
+from src.build_all_possible_lines import all_possible_lines
+from src.create_new_lines import build_lines
+from src.data_types.distance_matrix import DistanceMatrix
+from src.data_types.graph import Graph
+from src.data_types.route import Route
+from src.load_lines import load_lines
+from src.load_map import build_map
+from src.output_data.save_route_json import save_route_json
+from src.route_efficiency import _evaluate_route_efficiency
+from src.shortest_line import _dijkstra
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+US_MAP_PATH = REPO_ROOT / "src" / "starting_data" / "maps" / "US_MAP.jpg"
+US_BOUNDS = {
+    "min_lat": 25.0,
+    "max_lat": 52.0,
+    "min_lon": -125.0,
+    "max_lon": -66.5,
+}
+
+DEFAULT_SIZES = [250, 1000, 2500]
+
+# Floyd–Warshall is cubic, so it is only timed on maps up to this size
+FLOYD_WARSHALL_MAX_CITIES = 400
+
+# Tickets in the random deck evaluated on synthetic maps
+DECK_SIZE = 500
+
+# City pairs checked against the reference _dijkstra per map and engine
+CHECKED_PAIRS = 200
+
+
+def _time(function: Callable[[], Any], repeat: int) -> Tuple[Any, List[float]]:
+    """Run function repeat times with its prints silenced; return the last result."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = function()
+            timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def _record(
+    results: List[dict],
+    map_name: str,
+    stage: str,
+    timings: List[float],
+    items: int = 1,
+) -> None:
+    """items is the number of units one run handles, for per-item timings."""
+    entry = {
+        "map": map_name,
+        "stage": stage,
+        "repeat": len(timings),
+        "items": items,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "per_item_s": min(timings) / items,
+    }
+    results.append(entry)
+    print(
+        f"{map_name:>16} {stage:<28} {entry['min_s'] * 1000:10.2f} ms"
+        + (f"  ({entry['per_item_s'] * 1000:.2f} ms each)" if items > 1 else ""),
+        file=sys.stderr,
+    )
+
+
+def _check_engine(
+    checks: List[dict],
+    map_name: str,
+    engine: str,
+    graph: Graph,
+    matrix: DistanceMatrix,
+    rng: random.Random,
+) -> None:
+    """Compare sampled distances of matrix with single-pair reference searches."""
+    n = len(graph)
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(CHECKED_PAIRS)]
+    mismatches = []
+    for s, t in pairs:
+        expected, _ = _dijkstra(graph.cities[s], graph.cities[t], graph)
+        actual = matrix.distance(graph.cities[s], graph.cities[t])
+        if actual != expected:
+            mismatches.append(
+                {
+                    "a": str(graph.cities[s]),
+                    "b": str(graph.cities[t]),
+                    "expected": expected,
+                    "actual": actual,
+                }
+            )
+    checks.append(
+        {
+            "map": map_name,
+            "engine": engine,
+            "pairs": len(pairs),
+            "mismatches": mismatches[:10],
+            "passed": not mismatches,
+        }
+    )
+    if mismatches:
+        print(
+            f"{map_name:>16} {engine} disagrees with _dijkstra on "
+            f"{len(mismatches)} of {len(pairs)} pairs",
+            file=sys.stderr,
+        )
+
+
+def benchmark_us_map(
+    results: List[dict], checks: List[dict], repeat: int, cards: int, seed: int
+) -> None:
+    """Every pipeline stage on the real map, from loading to rendering cards."""
+    name = "us"
+    graph, timings = _time(build_map, repeat)
+    _record(results, name, "build_map", timings)
+
+    matrix, timings = _time(lambda: all_shortest_lines(graph, "dijkstra"), repeat)
+    _record(results, name, "all_shortest_lines/dijkstra", timings)
+    _check_engine(checks, name, "dijkstra", graph, matrix, random.Random(seed))
+
+    matrix, timings = _time(lambda: all_shortest_lines(graph, "floyd_warshall"), repeat)
+    _record(results, name, "all_shortest_lines/floyd", timings)
+    _check_engine(checks, name, "floyd_warshall", graph, matrix, random.Random(seed))
+
+    _benchmark_route_stages(results, name, graph, load_lines(), repeat, cards, US_BOUNDS)
+
+
+def _benchmark_route_stages(
+    results: List[dict],
+    name: str,
+    graph: Graph,
+    deck: List[Route],
+    repeat: int,
+    cards: int,
+    bounds: dict,
+) -> None:
+    """From all-pairs distances to a valued deck on disk and rendered cards."""
+    all_distances, timings = _time(lambda: all_possible_lines(graph), repeat)
+    _record(results, name, "all_possible_lines", timings)
+
+    new_lines, timings = _time(lambda: build_lines(all_distances), repeat)
+    _record(results, name, "build_lines", timings, len(all_distances))
+
+    _, timings = _time(lambda: _evaluate_route_efficiency(all_distances, deck), repeat)
+    _record(results, name, "_evaluate_route_efficiency", timings, len(deck))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "routes.json"
+        _, timings = _time(lambda: save_route_json(new_lines, path), repeat)
+    _record(results, name, "save_route_json", timings, len(new_lines))
+
+    if cards > 0:
+        _benchmark_cards(results, name, graph, new_lines[:cards], repeat, bounds)
+
+
+def _benchmark_cards(
+    results: List[dict],
+    name: str,
+    graph: Graph,
+    routes: List[Route],
+    repeat: int,
+    bounds: dict,
+) -> None:
+    # Imported here so the graph benchmarks also run where Pillow is missing
+    from PIL import Image
+
+    from src.image_processing.visualize_route import (
+        _prepare_base_image,
+        _visualize_single_route,
+    )
+
+    base_img = _prepare_base_image(Image.open(US_MAP_PATH))
+    width, height = base_img.size
+
+    def render() -> None:
+        for route in routes:
+            _visualize_single_route(
+                route, io.BytesIO(), base_img, width, height, graph, bounds
+            )
+
+    _, timings = _time(render, repeat)
+    _record(results, name, "_visualize_single_route", timings, len(routes))
+
+
+def benchmark_synthetic_map(
+    results: List[dict],
+    checks: List[dict],
+    size: int,
+    repeat: int,
+    cards: int,
+    seed: int,
+) -> None:
+    """
+    Every stage on a generated map, loaded through build_map from its location
+    data. Its cards are drawn over the US map image, which covers the same area.
+    """
+    name = f"synthetic-{size}"
+    generated, timings = _time(lambda: synthetic_map(size, seed), 1)
+    _record(results, name, "synthetic_map", timings)
+
+    locations = generated.to_locations_json()
+    graph, timings = _time(lambda: build_map(locations), repeat)
+    _record(results, name, "build_map", timings)
+
+    matrix, timings = _time(lambda: all_shortest_lines(graph, "dijkstra"), repeat)
+    _record(results, name, "all_shortest_lines/dijkstra", timings)
+    _check_engine(checks, name, "dijkstra", graph, matrix, random.Random(seed))
+
+    if size <= FLOYD_WARSHALL_MAX_CITIES:
+        matrix, timings = _time(
+            lambda: all_shortest_lines(graph, "floyd_warshall"), repeat
+        )
+        _record(results, name, "all_shortest_lines/floyd", timings)
+        _check_engine(
+            checks, name, "floyd_warshall", graph, matrix, random.Random(seed)
+        )
+
+    # A random deck of DECK_SIZE tickets valued like the US deck
+    rng = random.Random(seed)
+    deck = [
+        Route(graph.cities[a], graph.cities[b], rng.randint(4, 22))
+        for a, b in (rng.sample(range(size), 2) for _ in range(DECK_SIZE))
+    ]
+    _benchmark_route_stages(
+        results, name, graph, deck, repeat, cards, SYNTHETIC_BOUNDS
+    )
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    sizes: List[int] = DEFAULT_SIZES,
+    repeat: int = 3,
+    cards: int = 20,
+    seed: int = 0,
+    include_us_map: bool = True,
+) -> Dict[str, Any]:
+    results: List[dict] = []
+    checks: List[dict] = []
+    if include_us_map:
+        benchmark_us_map(results, checks, repeat, cards, seed)
+    for size in sizes:
+        benchmark_synthetic_map(results, checks, size, repeat, cards, seed)
+
+    return {
+        "meta": {
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+        "checks": checks,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the route pipeline.")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="*",
+        default=DEFAULT_SIZES,
+        help="city counts of the synthetic maps",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--cards",
+        type=int,
+        default=20,
+        help="route cards to render on the US map (0 skips rendering)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-us-map", action="store_true")
+    parser.add_argument(
+        "--output", type=Path, help="write the JSON results here instead of stdout"
+    )
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        args.sizes, args.repeat, args.cards, args.seed, not args.skip_us_map
+    )
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text)
+
+    # A failed correctness check fails the run
+    return 0 if all(check["passed"] for check in report["checks"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import math
+import random
+from typing import Dict, List, Tuple
+
+from src.data_types.city_registry import CityRegistry
+from src.data_types.graph import Graph
+from src.data_types.track_colors import COLOR_BITS, TrackColor
+
+# Synthetic cities are scattered over roughly the area of the US map
+SYNTHETIC_BOUNDS = {
+    "min_lat": 25.0,
+    "max_lat": 52.0,
+    "min_lon": -125.0,
+    "max_lon": -66.5,
+}
+
+# Track lengths are scaled so the median connection is about this long,
+# then clamped to what fits on a board
+MEDIAN_TRACK_LENGTH = 3.5
+MIN_TRACK_LENGTH = 1
+MAX_TRACK_LENGTH = 6
+
+GREY_TRACK_CHANCE = 0.3
+DOUBLE_TRACK_CHANCE = 0.2
+
+
+def synthetic_map(city_count: int, seed: int = 0, nearest: int = 8) -> Graph:
+    """
+    Random planar map with board-like connectivity: cities are scattered uniformly,
+    each keeps the Gabriel-graph connections to its `nearest` closest cities (about
+    four per city on average), and any islands left over are joined to their closest
+    outside city. Track lengths, colors and double tracks are random but seeded.
+    """
+    rng = random.Random(seed)
+    lat_span = SYNTHETIC_BOUNDS["max_lat"] - SYNTHETIC_BOUNDS["min_lat"]
+    lon_span = SYNTHETIC_BOUNDS["max_lon"] - SYNTHETIC_BOUNDS["min_lon"]
+    points = [
+        (
+            SYNTHETIC_BOUNDS["min_lon"] + rng.random() * lon_span,
+            SYNTHETIC_BOUNDS["min_lat"] + rng.random() * lat_span,
+        )
+        for _ in range(city_count)
+    ]
+
+    grid = _PointGrid(points)
+    pairs = set()
+    for i in range(city_count):
+        for j in grid.nearest(i, nearest):
+            key = (i, j) if i < j else (j, i)
+            if key not in pairs and _is_gabriel_edge(key[0], key[1], points, grid):
+                pairs.add(key)
+    _connect_components(pairs, points)
+
+    lengths = {pair: math.dist(points[pair[0]], points[pair[1]]) for pair in pairs}
+    unit = (_median(list(lengths.values())) / MEDIAN_TRACK_LENGTH) if lengths else 1.0
+    card_colors = [color for color in TrackColor if color != TrackColor.GREY]
+
+    edges: Dict[Tuple[int, int], int] = {}
+    colors: Dict[Tuple[int, int], int] = {}
+    tracks: Dict[Tuple[int, int], int] = {}
+    for pair in sorted(pairs):
+        edges[pair] = min(
+            MAX_TRACK_LENGTH, max(MIN_TRACK_LENGTH, round(lengths[pair] / unit))
+        )
+        if rng.random() < GREY_TRACK_CHANCE:
+            colors[pair] = COLOR_BITS[TrackColor.GREY]
+        else:
+            colors[pair] = COLOR_BITS[rng.choice(card_colors)]
+        tracks[pair] = 2 if rng.random() < DOUBLE_TRACK_CHANCE else 1
+
+    cities = list(CityRegistry(f"City {i:05d}" for i in range(city_count)))
+    coordinates = [{"lat": lat, "lon": lon} for lon, lat in points]
+    return Graph.from_edges(cities, coordinates, edges, colors, tracks)
+
+
+class _PointGrid:
+    """Uniform bucket grid with about two points per cell for neighborhood queries."""
+
+    def __init__(self, points: List[Tuple[float, float]]):
+        self.points = points
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        self.min_x, self.min_y = min(xs), min(ys)
+        area = max(max(xs) - self.min_x, 1e-9) * max(max(ys) - self.min_y, 1e-9)
+        self.cell = math.sqrt(area * 2 / len(points))
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, point in enumerate(points):
+            self.cells.setdefault(self._cell_of(point), []).append(i)
+        self.max_ring = int(max(max(xs) - self.min_x, max(ys) - self.min_y) / self.cell) + 1
+
+    def _cell_of(self, point: Tuple[float, float]) -> Tuple[int, int]:
+        return (
+            int((point[0] - self.min_x) / self.cell),
+            int((point[1] - self.min_y) / self.cell),
+        )
+
+    def _ring(self, center: Tuple[int, int], ring: int) -> List[int]:
+        cx, cy = center
+        found = []
+        for gx in range(cx - ring, cx + ring + 1):
+            for gy in range(cy - ring, cy + ring + 1):
+                if max(abs(gx - cx), abs(gy - cy)) == ring:
+                    found.extend(self.cells.get((gx, gy), ()))
+        return found
+
+    def nearest(self, i: int, count: int) -> List[int]:
+        point = self.points[i]
+        center = self._cell_of(point)
+        found: List[Tuple[float, int]] = []
+        for ring in range(self.max_ring + 1):
+            found.extend(
+                (math.dist(point, self.points[j]), j)
+                for j in self._ring(center, ring)
+                if j != i
+            )
+            # Anything in a later ring is at least ring * cell away
+            if len(found) >= count:
+                found.sort()
+                if found[count - 1][0] <= ring * self.cell:
+                    break
+        found.sort()
+        return [j for _, j in found[:count]]
+
+    def within(self, point: Tuple[float, float], radius: float) -> List[int]:
+        low = self._cell_of((point[0] - radius, point[1] - radius))
+        high = self._cell_of((point[0] + radius, point[1] + radius))
+        found = []
+        for gx in range(low[0], high[0] + 1):
+            for gy in range(low[1], high[1] + 1):
+                found.extend(self.cells.get((gx, gy), ()))
+        return found
+
+
+def _is_gabriel_edge(i: int, j: int, points, grid: _PointGrid) -> bool:
+    """No other city lies inside the circle whose diameter is the connection."""
+    (xi, yi), (xj, yj) = points[i], points[j]
+    middle = ((xi + xj) / 2, (yi + yj) / 2)
+    radius_squared = ((xi - xj) ** 2 + (yi - yj) ** 2) / 4
+    for k in grid.within(middle, math.sqrt(radius_squared)):
+        if k != i and k != j:
+            xk, yk = points[k]
+            if (xk - middle[0]) ** 2 + (yk - middle[1]) ** 2 < radius_squared:
+                return False
+    return True
+
+
+def _connect_components(pairs: set, points) -> None:
+    """Join every island to the closest city outside it until the map is connected."""
+    n = len(points)
+    while True:
+        parent = list(range(n))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for i, j in pairs:
+            parent[find(i)] = find(j)
+
+        components: Dict[int, List[int]] = {}
+        for i in range(n):
+            components.setdefault(find(i), []).append(i)
+        if len(components) <= 1:
+            return
+
+        smallest = min(components.values(), key=len)
+        members = set(smallest)
+        _, i, j = min(
+            (math.dist(points[i], points[j]), i, j)
+            for i in smallest
+            for j in range(n)
+            if j not in members
+        )
+        pairs.add((i, j) if i < j else (j, i))
+
+
+def _median(values: List[float]) -> float:
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
@@ -1,31 +1,18 @@
-from typing import Dict
-
-from src.data_types.cities import City
-from src.shortest_line import shortest_line
+from src.all_shortest_lines import all_shortest_lines
+from src.data_types.pair_table import PairTable
+from src.distance_cache import cached_all_shortest_lines
 
 
 # double_count: If True, counts both (A, B) and (B, A) as separate entries and will use the lowest distance for each calculation.
 # This should be obsolete if Dijkstra's algorithm is implemented correctly, but is left here for validation.
-def all_possible_lines(
-    city_map, double_count=False
-) -> Dict[frozenset[City, City], int]:
-    distances = {}
-    cities = list(city_map.keys())
-
-    for start in cities:
-        for end in cities:
-            if start == end:
-                continue
-
-            if not double_count and frozenset({start, end}) in distances:
-                continue
-
-            distance, _ = shortest_line(start, end, city_map)
-
-            if double_count and frozenset({start, end}) in distances:
-                distance = min(distances[frozenset({start, end})], distance)
-
-            distances[frozenset({start, end})] = distance
+# use_cache: If True, reuses the distance matrix stored on disk for this exact map when there is one.
+# Returns a PairTable; table.as_pair_dict() gives the older frozenset-keyed view.
+def all_possible_lines(city_map, double_count=False, use_cache=False) -> PairTable:
+    if use_cache:
+        matrix = cached_all_shortest_lines(city_map)
+    else:
+        matrix = all_shortest_lines(city_map)
+    distances = PairTable.from_matrix(matrix, double_count=double_count)
 
     print(f"\nTotal unique city pairs: {len(distances)}")
     return distances
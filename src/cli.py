@@ -0,0 +1,605 @@
+"""
+Command-line entry point: python -m src <command>
+
+    distances   compute (or reuse) the all-pairs distance matrix
+    deck        value every city pair and save the new deck
+    report      print the efficiency report of a deck
+    stats       compare efficiency statistics of several decks
+    sweep       score ticket valuation settings against the original deck
+    select      pick a balanced deck of a given size from every city pair
+    simulate    estimate how often each ticket of a deck gets completed
+    criticality rank tracks by how much longer lines get without them
+    render      draw a deck's route cards, or a one-image overview
+    path        show the shortest line between two cities
+    all         everything main.py does: deck, report, save and render
+
+Each command imports only what it needs, so the compute-only commands never load
+Pillow. Stage outputs carry over between runs: the distance matrix is cached on
+disk, "deck" saves to output_data/routes where later commands pick it up, and
+rendering reuses unchanged cards from the previous output.
+
+With --stream, deck and all pass city pairs through the pipeline one source city
+at a time instead of building the whole table first: distances feed valuation,
+which feeds the deck file and then the renderer, so memory stays bounded and the
+first cards are written before the last distances are computed.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+SRC_DIR = Path(__file__).parent
+US_MAP_PATH = SRC_DIR / "starting_data" / "maps" / "US_MAP.jpg"
+US_BOUNDS = {
+    "min_lat": 25.0,
+    "max_lat": 52.0,
+    "min_lon": -125.0,
+    "max_lon": -66.5,
+}
+GENERATED_DECKS_DIR = SRC_DIR / "output_data" / "routes"
+
+# Decks that ship with the map, selectable by name with --deck
+NAMED_DECKS = ("original", "updated_2025")
+
+
+class _Session:
+    """The map and distances of one invocation, each loaded on first use."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self._bundle = None
+        self._graph = None
+        self._all_distances = None
+
+    @property
+    def bundle(self):
+        if self._bundle is None and self.args.bundle is not None:
+            from src.map_bundle import load_map_bundle
+
+            self._bundle = load_map_bundle(self.args.bundle)
+        return self._bundle
+
+    @property
+    def city_registry(self):
+        if self.bundle is not None:
+            return self.bundle.city_registry
+        from src.data_types.city_registry import US_CITIES
+
+        return US_CITIES
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            if self.bundle is not None:
+                self._graph = self.bundle.graph
+            else:
+                from src.load_map import build_map
+
+                self._graph = build_map()
+        return self._graph
+
+    def matrix(self):
+        if self.args.no_cache:
+            from src.all_shortest_lines import all_shortest_lines
+
+            return all_shortest_lines(self.graph)
+        from src.distance_cache import cached_all_shortest_lines
+
+        return cached_all_shortest_lines(self.graph)
+
+    @property
+    def all_distances(self):
+        if self._all_distances is None:
+            from src.build_all_possible_lines import all_possible_lines
+
+            self._all_distances = all_possible_lines(
+                self.graph, use_cache=not self.args.no_cache
+            )
+        return self._all_distances
+
+    def deck(self, deck: str | None):
+        """
+        The deck named by --deck: a shipped deck name, a route JSON file, or by
+        default the most recently saved generated deck (built afresh if there is none).
+        """
+        import json
+
+        from src.load_lines import load_lines
+
+        if deck in NAMED_DECKS:
+            if self.bundle is not None and deck in self.bundle.decks:
+                return self.bundle.decks[deck]
+            from src.starting_data.load_route_json import load_route_json
+
+            return load_lines(load_route_json(f"{deck}.json"), self.city_registry)
+
+        if deck is None:
+            saved = sorted(
+                GENERATED_DECKS_DIR.glob("*_updated_routes.json"),
+                key=lambda path: path.stat().st_mtime,
+            )
+            if not saved:
+                print("No saved deck found; building one from the distances")
+                from src.create_new_lines import build_lines
+
+                return build_lines(self.all_distances)
+            deck = saved[-1]
+            print(f"Using saved deck: {deck}")
+
+        with open(deck, "r") as f:
+            return load_lines(json.load(f), self.city_registry)
+
+
+def _distances(session: _Session) -> None:
+    from src.data_types.pair_table import PairTable
+
+    matrix = session.matrix()
+    table = PairTable.from_matrix(matrix)
+    print(f"Cities: {matrix.size}")
+    print(f"Total unique city pairs: {len(table)}")
+    if session.args.output is not None:
+        import json
+
+        # One row per pair, cities in name order
+        cities = table.cities
+        rows = sorted(
+            (*sorted((cities[i].value, cities[j].value)), distance)
+            for i, j, distance in table.pairs()
+        )
+        with open(session.args.output, "w") as f:
+            json.dump(
+                [{"a": a, "b": b, "distance": d} for a, b, d in rows], f, indent=2
+            )
+        print(f"Distances saved to: {session.args.output}")
+
+
+def _stream_deck(session: _Session, output: Path | None = None):
+    """Routes of the generated deck as they are valued and written to output."""
+    from src.all_shortest_lines import stream_shortest_lines
+    from src.create_new_lines import stream_lines
+    from src.output_data.save_route_json import stream_route_json
+
+    graph = session.graph
+    return stream_route_json(
+        stream_lines(stream_shortest_lines(graph), graph.cities), output
+    )
+
+
+def _deck(session: _Session) -> None:
+    if session.args.stream:
+        count = sum(1 for _ in _stream_deck(session, session.args.output))
+        print(f"New number of lines: {count}")
+        print(f"Deck saved to: {session.args.output or GENERATED_DECKS_DIR}")
+        return
+
+    from src.create_new_lines import build_lines
+    from src.output_data.save_route_json import save_route_json
+
+    new_lines = build_lines(session.all_distances)
+    print(f"New number of lines: {len(new_lines)}")
+    save_route_json(new_lines, session.args.output)
+    print(f"Deck saved to: {session.args.output or GENERATED_DECKS_DIR}")
+
+
+def _report(session: _Session) -> None:
+    from src.route_efficiency import print_route_efficiency_report
+
+    deck = session.deck(session.args.deck)
+    print_route_efficiency_report(session.all_distances, deck)
+
+
+def _stats(session: _Session) -> None:
+    from src.efficiency_stats import compare_decks, format_comparison
+
+    args = session.args
+    deck_names = args.deck or [*NAMED_DECKS, None]
+    decks = {
+        "generated" if name is None else Path(name).stem: session.deck(name)
+        for name in deck_names
+    }
+    results = compare_decks(decks, session.matrix(), bins=args.bins)
+    print(format_comparison(results))
+    if args.output is not None:
+        import json
+
+        with open(args.output, "w") as f:
+            json.dump([result.to_json() for result in results], f, indent=2)
+        print(f"Statistics saved to: {args.output}")
+
+
+def _sweep(session: _Session) -> None:
+    from src.load_lines import load_lines
+    from src.starting_data.load_route_json import load_original_route_json
+    from src.ticket_valuation import (
+        DEFAULT_SPREAD,
+        DEFAULT_STEP,
+        fit_multiplier,
+        format_sweep,
+        multipliers_around,
+        sweep_valuations,
+        valuation_grid,
+    )
+
+    args = session.args
+    table = session.all_distances
+    baseline = load_lines(load_original_route_json(), session.city_registry)
+    center = fit_multiplier(baseline, table) if args.center is None else args.center
+    spread = DEFAULT_SPREAD if args.spread is None else args.spread
+    step = DEFAULT_STEP if args.step is None else args.step
+    try:
+        multipliers = multipliers_around(center, spread, step)
+    except ValueError as error:
+        raise SystemExit(str(error))
+    grid = valuation_grid(
+        multipliers,
+        args.rounding or ("round",),
+        args.floor or (1,),
+        args.cap or (None,),
+    )
+    print(f"Scoring {len(grid)} valuation settings")
+    sweep = sweep_valuations(table, baseline, grid)
+    print(format_sweep(sweep, args.top))
+    if args.output is not None:
+        import json
+
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "baseline_multiplier": sweep.baseline_multiplier,
+                    "results": [result.to_json() for result in sweep.best(args.top)],
+                },
+                f,
+                indent=2,
+            )
+        print(f"Sweep saved to: {args.output}")
+
+
+def _select(session: _Session) -> None:
+    from src.create_new_lines import build_lines
+    from src.deck_selection import DeckTargets, select_deck
+    from src.output_data.save_route_json import save_route_json
+
+    args = session.args
+    reference = session.deck(args.reference)
+    pinned = session.deck(args.pin) if args.pin is not None else ()
+    targets = DeckTargets.from_reference(
+        reference,
+        args.size,
+        len(session.graph),
+        value_weight=args.value_weight,
+        coverage_weight=args.coverage_weight,
+        long_weight=args.long_weight,
+    )
+    selection = select_deck(
+        build_lines(session.all_distances),
+        args.size,
+        targets,
+        pinned=pinned,
+        steps=args.steps,
+        seed=args.seed,
+    )
+    print(
+        f"Selected {len(selection.routes)} tickets ({selection.pinned} pinned), "
+        f"cost {selection.cost:.4f}, "
+        f"{selection.swaps_accepted} of {selection.swaps_evaluated} swaps accepted"
+    )
+    save_route_json(selection.routes, args.output)
+    print(f"Deck saved to: {args.output or GENERATED_DECKS_DIR}")
+
+
+def _simulate(session: _Session) -> None:
+    from src.game_simulation import (
+        GameRules,
+        format_ticket_odds,
+        simulate_games,
+    )
+
+    args = session.args
+    rules = GameRules(
+        players=args.players, tickets_per_player=args.tickets, trains=args.trains
+    )
+    odds = simulate_games(
+        session.deck(args.deck),
+        session.graph,
+        args.games,
+        rules,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    print(format_ticket_odds(odds))
+    if args.output is not None:
+        import json
+
+        with open(args.output, "w") as f:
+            json.dump([ticket.to_json() for ticket in odds], f, indent=2)
+        print(f"Ticket odds saved to: {args.output}")
+
+
+def _criticality(session: _Session) -> None:
+    from src.track_criticality import deck_pairs, format_criticality, track_criticality
+
+    args = session.args
+    graph = session.graph
+    reports = track_criticality(graph, session.matrix(), workers=args.workers)
+    deck = None
+    if args.deck is not None:
+        deck = deck_pairs(session.deck(args.deck), graph)
+    print(format_criticality(reports, graph.cities, deck, args.top))
+    if args.output is not None:
+        import json
+
+        with open(args.output, "w") as f:
+            json.dump([report.to_json(graph.cities) for report in reports], f, indent=2)
+        print(f"Track criticality saved to: {args.output}")
+
+
+def _render(session: _Session) -> None:
+    args = session.args
+    if args.overview is not None:
+        from src.image_processing.deck_overview import visualize_deck_overview
+
+        # Without a deck, the track overviews count every pair of cities
+        if args.overview in ("tracks", "criticality") and args.deck is None:
+            routes = None
+        else:
+            routes = session.deck(args.deck)
+        output_path = visualize_deck_overview(
+            routes,
+            session.graph,
+            str(args.map_image),
+            bounds=US_BOUNDS,
+            by=args.overview,
+            matrix=session.matrix() if args.overview != "routes" else None,
+            output_path=args.output,
+        )
+        print(f"Deck overview saved to: {output_path}")
+        return
+
+    from src.image_processing.visualize_route import visualize_route
+
+    output_path = visualize_route(
+        session.deck(args.deck),
+        session.graph,
+        str(args.map_image),
+        bounds=US_BOUNDS,
+        workers=args.workers,
+        output=args.output,
+        incremental=not args.full,
+        image_format=args.format,
+    )
+    print(f"Route visualizations saved to: {output_path}")
+
+
+def _path(session: _Session) -> None:
+    from src.shortest_line import format_line_stops, shortest_lines_stops
+
+    registry = session.city_registry
+    try:
+        a, b = registry.get(session.args.a), registry.get(session.args.b)
+    except ValueError as error:
+        raise SystemExit(str(error))
+
+    (line,) = shortest_lines_stops(session.matrix(), [(a, b)])
+    if line is None:
+        print(f"No line connects {a.value} and {b.value}")
+        return
+    stops, legs = line
+    print(f"Distance: {sum(legs)}")
+    print(format_line_stops(stops, legs))
+
+
+def _all(session: _Session) -> None:
+    if session.args.stream:
+        _all_streamed(session)
+        return
+
+    from src.create_new_lines import build_lines
+    from src.output_data.save_route_json import save_route_json
+    from src.route_efficiency import print_route_efficiency_report
+
+    all_distances = session.all_distances
+    original_lines = session.deck("updated_2025")
+    new_lines = build_lines(all_distances)
+    print(f"Original number of lines: {len(original_lines)}")
+    print(f"New number of lines: {len(new_lines)}")
+
+    print_route_efficiency_report(all_distances, new_lines)
+
+    save_route_json(new_lines)
+
+    from src.image_processing.visualize_route import visualize_route
+
+    # Render on every core; the worker processes re-import this module under spawn
+    zip_file_path = visualize_route(
+        new_lines,
+        session.graph,
+        str(session.args.map_image),
+        bounds=US_BOUNDS,
+        workers=None,
+    )
+    print(f"Route visualizations saved to: {zip_file_path}")
+
+
+def _all_streamed(session: _Session) -> None:
+    # The report needs every distance up front, so it is left to the report command
+    from src.image_processing.visualize_route import visualize_route
+
+    zip_file_path = visualize_route(
+        _stream_deck(session),
+        session.graph,
+        str(session.args.map_image),
+        bounds=US_BOUNDS,
+        workers=None,
+    )
+    print(f"Deck saved to: {GENERATED_DECKS_DIR}")
+    print(f"Route visualizations saved to: {zip_file_path}")
+
+
+def _cap(text: str) -> int | None:
+    if text.lower() == "none":
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected a number or "none": {text}')
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Ticket to Ride route tools.",
+    )
+    parser.add_argument(
+        "--bundle", type=Path, help="load the map from a compiled map bundle"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="recompute distances instead of reusing the on-disk matrix",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    distances = commands.add_parser("distances", help="compute all pair distances")
+    distances.add_argument("--output", type=Path, help="also save them as JSON")
+    distances.set_defaults(run=_distances)
+
+    stream_help = "pass city pairs through one source city at a time"
+    deck = commands.add_parser("deck", help="value every city pair and save the deck")
+    deck.add_argument(
+        "--output", type=Path, help="deck file (default: dated file in output_data)"
+    )
+    deck.add_argument("--stream", action="store_true", help=stream_help)
+    deck.set_defaults(run=_deck)
+
+    deck_help = (
+        f"{' or '.join(NAMED_DECKS)}, or a route JSON file "
+        "(default: the last deck saved by the deck command)"
+    )
+    report = commands.add_parser("report", help="print a deck's efficiency report")
+    report.add_argument("--deck", help=deck_help)
+    report.set_defaults(run=_report)
+
+    stats = commands.add_parser("stats", help="compare deck efficiency statistics")
+    stats.add_argument(
+        "--deck",
+        action="append",
+        help="a deck to include, as for report; repeat for more "
+        "(default: the shipped decks and the last saved deck)",
+    )
+    stats.add_argument("--bins", type=int, default=10, help="histogram bins")
+    stats.add_argument("--output", type=Path, help="also save the results as JSON")
+    stats.set_defaults(run=_stats)
+
+    sweep = commands.add_parser(
+        "sweep", help="score ticket valuation settings against the original deck"
+    )
+    sweep.add_argument(
+        "--center", type=float, help="middle multiplier (default: fitted baseline)"
+    )
+    sweep.add_argument("--spread", type=float, help="multipliers either side of it")
+    sweep.add_argument("--step", type=float, help="multiplier step")
+    sweep.add_argument(
+        "--rounding", action="append", choices=("round", "floor", "ceil")
+    )
+    sweep.add_argument("--floor", action="append", type=int, help="minimum value")
+    sweep.add_argument(
+        "--cap",
+        action="append",
+        type=_cap,
+        help='maximum value, or "none" for no cap; repeat for more. Only the caps '
+        'given are tried, so add "none" to keep uncapped values (default: none)',
+    )
+    sweep.add_argument("--top", type=int, default=10, help="settings to report")
+    sweep.add_argument("--output", type=Path, help="also save the best as JSON")
+    sweep.set_defaults(run=_sweep)
+
+    select = commands.add_parser(
+        "select", help="pick a balanced deck of a given size from every city pair"
+    )
+    select.add_argument("--size", type=int, required=True, help="tickets in the deck")
+    select.add_argument(
+        "--reference",
+        default="updated_2025",
+        help="deck whose value spread and long/short mix to aim for, as for report",
+    )
+    select.add_argument(
+        "--pin", help="deck whose tickets must all be kept, e.g. updated_2025"
+    )
+    select.add_argument("--steps", type=int, default=1_000_000, help="swaps to try")
+    select.add_argument("--seed", type=int, help="random seed")
+    select.add_argument("--value-weight", type=float, default=1.0)
+    select.add_argument("--coverage-weight", type=float, default=1.0)
+    select.add_argument("--long-weight", type=float, default=1.0)
+    select.add_argument(
+        "--output", type=Path, help="deck file (default: dated file in output_data)"
+    )
+    select.set_defaults(run=_select)
+
+    simulate = commands.add_parser(
+        "simulate", help="estimate how often each ticket gets completed"
+    )
+    simulate.add_argument("--deck", help=deck_help)
+    simulate.add_argument("--games", type=int, default=10_000, help="games to play")
+    simulate.add_argument("--players", type=int, default=4)
+    simulate.add_argument("--tickets", type=int, default=3, help="tickets per player")
+    simulate.add_argument("--trains", type=int, default=45, help="trains per player")
+    simulate.add_argument("--seed", type=int, default=0, help="random seed")
+    simulate.add_argument(
+        "--workers", type=int, help="processes to play with (default: every core)"
+    )
+    simulate.add_argument("--output", type=Path, help="also save the odds as JSON")
+    simulate.set_defaults(run=_simulate)
+
+    criticality = commands.add_parser(
+        "criticality", help="rank tracks by how much longer lines get without them"
+    )
+    criticality.add_argument(
+        "--deck", help="also count the tickets of this deck affected, as for report"
+    )
+    criticality.add_argument("--top", type=int, default=20, help="tracks to list")
+    criticality.add_argument(
+        "--workers", type=int, help="processes to use (default: every core)"
+    )
+    criticality.add_argument("--output", type=Path, help="also save every report")
+    criticality.set_defaults(run=_criticality)
+
+    render = commands.add_parser("render", help="draw route cards")
+    render.add_argument("--deck", help=deck_help)
+    render.add_argument("--map-image", type=Path, default=US_MAP_PATH)
+    render.add_argument("--format", choices=("jpeg", "svg"), default="jpeg")
+    render.add_argument(
+        "--workers", type=int, help="processes to render with (default: every core)"
+    )
+    render.add_argument("--output", help="zip file or directory to write cards to")
+    render.add_argument(
+        "--full", action="store_true", help="re-render cards even if unchanged"
+    )
+    render.add_argument(
+        "--overview",
+        choices=("routes", "tracks", "criticality"),
+        help="draw one overview image of the deck instead of cards",
+    )
+    render.set_defaults(run=_render)
+
+    path = commands.add_parser("path", help="shortest line between two cities")
+    path.add_argument("a")
+    path.add_argument("b")
+    path.set_defaults(run=_path)
+
+    everything = commands.add_parser("all", help="run the whole pipeline")
+    everything.add_argument("--map-image", type=Path, default=US_MAP_PATH)
+    everything.add_argument("--stream", action="store_true", help=stream_help)
+    everything.set_defaults(run=_all)
+
+    return parser
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = _parser().parse_args(argv)
+    args.run(_Session(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
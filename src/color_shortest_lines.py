@@ -0,0 +1,104 @@
+from array import array
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+from src.all_shortest_lines import all_shortest_lines
+from src.data_types.distance_matrix import DistanceMatrix
+from src.data_types.graph import Graph
+from src.data_types.track_colors import CARD_COLORS_MASK, WILDCARD_MASK
+
+
+class ColorConstrainedLines:
+    """
+    Shortest lines that may only use tracks of an allowed set of colors.
+
+    Color sets are TrackColor bitmasks. Grey tracks take any card color, so they are
+    usable whenever at least one card color is allowed. Results are cached per mask,
+    so asking about many pairs under the same colors costs one all-pairs run.
+    """
+
+    def __init__(self, city_map: Graph):
+        self.city_map = city_map
+        self._matrices: Dict[int, DistanceMatrix] = {}
+        self._components: Dict[int, array] = {}
+        self._masks_by_size = sorted(_submasks(CARD_COLORS_MASK), key=int.bit_count)
+
+    def matrix(self, allowed: int) -> DistanceMatrix:
+        usable = _usable_mask(allowed)
+        if usable not in self._matrices:
+            self._matrices[usable] = all_shortest_lines(self._restricted_map(usable))
+        return self._matrices[usable]
+
+    def precompute(self, masks: Iterable[int]) -> None:
+        for allowed in masks:
+            self.matrix(allowed)
+
+    def shortest_line(self, start: Hashable, end: Hashable, allowed: int) -> int:
+        return self.matrix(allowed).distance(start, end)
+
+    def min_colors(self, start: Hashable, end: Hashable) -> Tuple[int, int] | None:
+        """
+        Fewest card colors that connect start and end, with one mask that achieves it.
+        Returns None when no color set connects them.
+        """
+        i, j = self.city_map.index[start], self.city_map.index[end]
+        if i == j:
+            return 0, 0
+        for allowed in self._masks_by_size:
+            components = self._connected_components(allowed)
+            if components[i] == components[j]:
+                return allowed.bit_count(), allowed
+        return None
+
+    def _restricted_map(self, usable: int) -> Graph:
+        city_map = self.city_map
+        edges, colors, tracks = {}, {}, {}
+        for i in range(len(city_map)):
+            for e in range(city_map.offsets[i], city_map.offsets[i + 1]):
+                j = city_map.neighbors[e]
+                if i < j and city_map.colors[e] & usable:
+                    edges[(i, j)] = city_map.weights[e]
+                    colors[(i, j)] = city_map.colors[e]
+                    tracks[(i, j)] = city_map.tracks[e]
+        return Graph.from_edges(
+            city_map.cities, city_map.coordinates, edges, colors, tracks
+        )
+
+    def _connected_components(self, allowed: int) -> array:
+        usable = _usable_mask(allowed)
+        if usable in self._components:
+            return self._components[usable]
+
+        city_map = self.city_map
+        parent = list(range(len(city_map)))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for i in range(len(city_map)):
+            for e in range(city_map.offsets[i], city_map.offsets[i + 1]):
+                if city_map.colors[e] & usable:
+                    root_i, root_j = find(i), find(city_map.neighbors[e])
+                    if root_i != root_j:
+                        parent[root_i] = root_j
+
+        components = array("i", (find(x) for x in range(len(city_map))))
+        self._components[usable] = components
+        return components
+
+
+def _usable_mask(allowed: int) -> int:
+    if allowed & CARD_COLORS_MASK:
+        return allowed | WILDCARD_MASK
+    return allowed
+
+
+def _submasks(mask: int) -> List[int]:
+    submasks = []
+    sub = mask
+    while sub:
+        submasks.append(sub)
+        sub = (sub - 1) & mask
+    return submasks
@@ -1,15 +1,28 @@
-from typing import Dict, List
+from typing import Hashable, Iterable, Iterator, List, Mapping, Sequence, Tuple
 
-from src.data_types.cities import City
+from src.data_types.pair_table import PairTable
 from src.data_types.route import Route
 
 AVERAGE_ROUTE_EFFICIENCY = 1.04
 
 
-def build_lines(lines: Dict[frozenset[City, City], int]) -> List[Route]:
-    new_lines = []
-    for connection, distance in lines.items():
-        a, b = connection
-        value = int(round(distance * AVERAGE_ROUTE_EFFICIENCY))
-        new_lines.append(Route(a=a, b=b, value=value))
-    return new_lines
+def build_lines(lines: PairTable | Mapping[frozenset, int]) -> List[Route]:
+    if isinstance(lines, PairTable):
+        cities = lines.cities
+        pairs = ((cities[i], cities[j], d) for i, j, d in lines.pairs())
+    else:
+        pairs = ((*connection, distance) for connection, distance in lines.items())
+
+    return [Route(a=a, b=b, value=ticket_value(distance)) for a, b, distance in pairs]
+
+
+def ticket_value(distance: int) -> int:
+    return int(round(distance * AVERAGE_ROUTE_EFFICIENCY))
+
+
+def stream_lines(
+    pairs: Iterable[Tuple[int, int, int]], cities: Sequence[Hashable]
+) -> Iterator[Route]:
+    """Value (i, j, distance) pairs, such as stream_shortest_lines', as they arrive."""
+    for i, j, distance in pairs:
+        yield Route(a=cities[i], b=cities[j], value=ticket_value(distance))
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Type
+
+from src.data_types.cities import City
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class RegisteredCity:
+    """
+    City loaded from map data. Mirrors the City enum's .name/.value, so it can be
+    used anywhere a City is. Each registry hands out one instance per city, so
+    comparisons usually stop at the identity check. Hashing uses the (cached)
+    string hash of the display name, so copies sent to worker processes still match.
+    """
+
+    name: str
+    value: str
+    id: int = field(default=-1)
+
+    def __eq__(self, other) -> bool:
+        return self is other or (
+            type(other) is RegisteredCity and self.value == other.value
+        )
+
+    def __hash__(self) -> int:
+        return hash(self.value)
+
+    def __repr__(self) -> str:
+        return f"<RegisteredCity.{self.name}: {self.value!r}>"
+
+
+AnyCity = City | RegisteredCity
+
+
+def city_key(display_name: str) -> str:
+    """Identifier form of a city name: "Sault Ste. Marie" -> "SAULT_STE_MARIE"."""
+    return re.sub(r"[^0-9A-Za-z]+", "_", display_name).strip("_").upper()
+
+
+class CityRegistry:
+    """
+    The cities of one map under dense ids, in the order they were added. Cities
+    are looked up by display name or identifier name, and unknown names can be
+    interned, so any map can be loaded from its data alone. from_enum() wraps an
+    existing Enum such as City, whose members are then used as they are; like the
+    Enum itself, such a registry is closed to new cities.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._cities: List[AnyCity] = []
+        self._ids: Dict[AnyCity, int] = {}
+        self._by_value: Dict[str, AnyCity] = {}
+        self._by_name: Dict[str, AnyCity] = {}
+        self._closed = False
+        for display_name in names:
+            self.intern(display_name)
+
+    @classmethod
+    def from_enum(cls, enum: Type[Enum]) -> CityRegistry:
+        registry = cls()
+        for member in enum:
+            registry._add(member)
+        registry._closed = True
+        return registry
+
+    def _add(self, city: AnyCity) -> AnyCity:
+        self._ids[city] = len(self._cities)
+        self._cities.append(city)
+        self._by_value.setdefault(city.value, city)
+        self._by_name.setdefault(city.name, city)
+        return city
+
+    def intern(self, city: AnyCity | str) -> AnyCity:
+        """The registered city for city, registering a new one if needed."""
+        if self._closed or not isinstance(city, str):
+            return self.get(city)
+        existing = self._by_value.get(city) or self._by_name.get(city.upper())
+        if existing is not None:
+            return existing
+        return self._add(RegisteredCity(city_key(city), city, len(self._cities)))
+
+    def get(self, city: AnyCity | str) -> AnyCity:
+        """Look up a registered city by itself, its display name or its name."""
+        if not isinstance(city, str):
+            if city in self._ids:
+                return self._cities[self._ids[city]]
+            raise ValueError(f"{city!r} is not a registered city")
+        found = self._by_value.get(city) or self._by_name.get(city.upper())
+        if found is None:
+            raise ValueError(f"{city!r} is not a registered city")
+        return found
+
+    def id_of(self, city: AnyCity | str) -> int:
+        return self._ids[self.get(city)]
+
+    def __getitem__(self, city_id: int) -> AnyCity:
+        return self._cities[city_id]
+
+    def __len__(self) -> int:
+        return len(self._cities)
+
+    def __iter__(self) -> Iterator[AnyCity]:
+        return iter(self._cities)
+
+    def __contains__(self, city: object) -> bool:
+        if isinstance(city, str):
+            return city in self._by_value or city.upper() in self._by_name
+        return city in self._ids
+
+
+# The original board, using the City enum members themselves
+US_CITIES = CityRegistry.from_enum(City)
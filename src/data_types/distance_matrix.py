@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Sequence, Tuple
+
+# Sentinel for pairs with no connecting track. Fits in a signed 32-bit slot so the
+# matrix can be stored in compact int arrays.
+UNREACHABLE = 2**31 - 1
+NO_PREDECESSOR = -1
+
+
+@dataclass(frozen=True, slots=True)
+class DistanceMatrix:
+    """
+    All-pairs shortest distances stored row-major in a flat sequence.
+
+    distances[i * n + j] is the shortest distance from cities[i] to cities[j] and
+    predecessors[i * n + j] is the index of the stop right before cities[j] on that
+    shortest line (NO_PREDECESSOR on the diagonal and for unreachable pairs).
+    """
+
+    cities: Tuple[Hashable, ...]
+    distances: Sequence[int]
+    predecessors: Sequence[int]
+    index: Dict[Hashable, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "cities", tuple(self.cities))
+        object.__setattr__(
+            self, "index", {city: i for i, city in enumerate(self.cities)}
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.cities)
+
+    def distance(self, start: Hashable, end: Hashable) -> int:
+        n = len(self.cities)
+        return self.distances[self.index[start] * n + self.index[end]]
+
+    def row(self, i: int) -> Sequence[int]:
+        n = len(self.cities)
+        return self.distances[i * n : (i + 1) * n]
+
+    def to_pair_dict(self, double_count=False) -> Dict[frozenset, int]:
+        # double_count: If True, reads both (A, B) and (B, A) and keeps the lowest distance.
+        # Both directions are equal for an undirected map, so this is only a validation mode.
+        n = len(self.cities)
+        distances = self.distances
+        lines = {}
+        for i in range(n):
+            start = self.cities[i]
+            for j in range(i + 1, n):
+                distance = distances[i * n + j]
+                if double_count:
+                    distance = min(distance, distances[j * n + i])
+                if distance == UNREACHABLE:
+                    continue
+                lines[frozenset({start, self.cities[j]})] = distance
+        return lines
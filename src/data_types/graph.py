@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterator, Mapping, Sequence, Tuple
+
+from src.data_types.location import Location
+from src.data_types.track_colors import mask_colors
+
+
+@dataclass(frozen=True, slots=True)
+class Graph:
+    """
+    Compact undirected map with cities stored under dense integer ids.
+
+    Edges are kept in CSR form: the neighbors of city i are
+    neighbors[offsets[i]:offsets[i + 1]] with matching weights in the same slots.
+    Every connection is stored once in each direction. colors holds a TrackColor
+    bitmask per slot and tracks the number of parallel tracks on that connection.
+    """
+
+    cities: Tuple[Hashable, ...]
+    coordinates: Tuple[dict[str, float] | None, ...]
+    offsets: Sequence[int]
+    neighbors: Sequence[int]
+    weights: Sequence[int]
+    colors: Sequence[int]
+    tracks: Sequence[int]
+    index: Dict[Hashable, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "cities", tuple(self.cities))
+        object.__setattr__(self, "coordinates", tuple(self.coordinates))
+        object.__setattr__(
+            self, "index", {city: i for i, city in enumerate(self.cities)}
+        )
+
+    @classmethod
+    def from_edges(
+        cls,
+        cities: Sequence[Hashable],
+        coordinates: Sequence[dict[str, float] | None],
+        edges: Mapping[Tuple[int, int], int],
+        colors: Mapping[Tuple[int, int], int] | None = None,
+        tracks: Mapping[Tuple[int, int], int] | None = None,
+    ) -> Graph:
+        """
+        Build the CSR arrays from {(i, j): distance} with each connection listed once.
+        colors and tracks are keyed the same way; missing entries default to no color
+        and a single track.
+        """
+        colors = colors or {}
+        tracks = tracks or {}
+        n = len(cities)
+        degree = [0] * n
+        for i, j in edges:
+            degree[i] += 1
+            degree[j] += 1
+
+        offsets = array("i", [0] * (n + 1))
+        for i in range(n):
+            offsets[i + 1] = offsets[i] + degree[i]
+
+        neighbors = array("i", [0] * offsets[n])
+        weights = array("i", [0] * offsets[n])
+        edge_colors = array("i", [0] * offsets[n])
+        edge_tracks = array("B", [1] * offsets[n])
+        fill = array("i", offsets[:n])
+        for (i, j), distance in edges.items():
+            mask = colors.get((i, j), 0)
+            track_count = tracks.get((i, j), 1)
+            for u, v in ((i, j), (j, i)):
+                neighbors[fill[u]] = v
+                weights[fill[u]] = distance
+                edge_colors[fill[u]] = mask
+                edge_tracks[fill[u]] = track_count
+                fill[u] += 1
+
+        return cls(
+            cities, coordinates, offsets, neighbors, weights, edge_colors, edge_tracks
+        )
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    def __contains__(self, city: Hashable) -> bool:
+        return city in self.index
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.neighbors) // 2
+
+    def coordinates_of(self, city: Hashable) -> dict[str, float] | None:
+        return self.coordinates[self.index[city]]
+
+    def edges(self) -> Iterator[Tuple[int, int, int]]:
+        """Yield every connection once as (i, j, distance) with i < j."""
+        offsets, neighbors, weights = self.offsets, self.neighbors, self.weights
+        for i in range(len(self.cities)):
+            for e in range(offsets[i], offsets[i + 1]):
+                j = neighbors[e]
+                if i < j:
+                    yield i, j, weights[e]
+
+    def edge_slot(self, i: int, j: int) -> int | None:
+        neighbors = self.neighbors
+        for e in range(self.offsets[i], self.offsets[i + 1]):
+            if neighbors[e] == j:
+                return e
+        return None
+
+    def edge_weight(self, i: int, j: int) -> int | None:
+        e = self.edge_slot(i, j)
+        return None if e is None else self.weights[e]
+
+    def with_connection(
+        self,
+        i: int,
+        j: int,
+        distance: int | None,
+        colors: int | None = None,
+        tracks: int | None = None,
+    ) -> Graph:
+        """
+        Return a copy with the connection i-j added, re-weighted, or removed (distance
+        None). Colors and track count are kept from the existing connection unless given.
+        """
+        edges, edge_colors, edge_tracks = {}, {}, {}
+        for u in range(len(self.cities)):
+            for e in range(self.offsets[u], self.offsets[u + 1]):
+                v = self.neighbors[e]
+                if u < v:
+                    edges[(u, v)] = self.weights[e]
+                    edge_colors[(u, v)] = self.colors[e]
+                    edge_tracks[(u, v)] = self.tracks[e]
+
+        key = (i, j) if i < j else (j, i)
+        if distance is None:
+            edges.pop(key, None)
+        else:
+            edges[key] = distance
+            if colors is not None:
+                edge_colors[key] = colors
+            if tracks is not None:
+                edge_tracks[key] = tracks
+        return Graph.from_edges(
+            self.cities, self.coordinates, edges, edge_colors, edge_tracks
+        )
+
+    def to_locations(self) -> Dict[Hashable, Location]:
+        """Expand into the object-per-city Location view."""
+        city_map = {
+            city: Location(city, coordinates=coordinates)
+            for city, coordinates in zip(self.cities, self.coordinates)
+        }
+        for i, j, distance in self.edges():
+            city_map[self.cities[i]].add_connection(city_map[self.cities[j]], distance)
+        return city_map
+
+    def to_locations_json(self) -> Dict[str, dict]:
+        """
+        Location file contents per city display name, in the layout build_map reads.
+        Each connection is listed at both ends with one color entry per track. When
+        a connection has more colors than tracks (its ends disagreed in the source
+        data), the colors are split between the two ends, which build_map merges.
+        """
+        locations: Dict[str, dict] = {}
+        for i, city in enumerate(self.cities):
+            connections = []
+            for e in range(self.offsets[i], self.offsets[i + 1]):
+                j, track_count = self.neighbors[e], self.tracks[e]
+                track_colors = [color.value for color in mask_colors(self.colors[e])]
+                if len(track_colors) > track_count:
+                    if i < j:
+                        track_colors = track_colors[:track_count]
+                    else:
+                        track_colors = track_colors[track_count:]
+                if track_colors:
+                    track_colors += track_colors[-1:] * (
+                        track_count - len(track_colors)
+                    )
+                connections.append(
+                    {
+                        "city": self.cities[j].value,
+                        "distance": self.weights[e],
+                        "colors": track_colors,
+                    }
+                )
+            location = {"connections": connections}
+            if self.coordinates[i] is not None:
+                location = {"coordinates": self.coordinates[i], **location}
+            locations[city.value] = location
+        return locations
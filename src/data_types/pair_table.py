@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import math
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterator, Tuple
+
+from src.data_types.distance_matrix import UNREACHABLE, DistanceMatrix
+
+
+def pair_id(i: int, j: int) -> int:
+    """
+    Canonical id of the unordered pair of distinct city ids i and j: the triangular
+    index hi * (hi - 1) / 2 + lo. Ids do not depend on the number of cities, so a
+    table only grows at the end when cities are added.
+    """
+    if i == j:
+        raise ValueError(f"City {i} does not form a pair with itself")
+    if i < j:
+        i, j = j, i
+    return i * (i - 1) // 2 + j
+
+
+def pair_from_id(k: int) -> Tuple[int, int]:
+    """The (lo, hi) city ids of pair id k."""
+    hi = (1 + math.isqrt(8 * k + 1)) // 2
+    return k - hi * (hi - 1) // 2, hi
+
+
+def pair_count(city_count: int) -> int:
+    return city_count * (city_count - 1) // 2
+
+
+@dataclass(frozen=True, slots=True)
+class PairTable:
+    """
+    One int per unordered pair of distinct cities, stored flat under pair_id.
+    Pairs without a value (cities with no connecting track) hold UNREACHABLE.
+    pairs() walks the table row by row (i < j), the order all_possible_lines has
+    always listed pairs in. as_pair_dict() gives the old frozenset-keyed view.
+    """
+
+    cities: Tuple[Hashable, ...]
+    values: array
+    index: Dict[Hashable, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "cities", tuple(self.cities))
+        object.__setattr__(
+            self, "index", {city: i for i, city in enumerate(self.cities)}
+        )
+        if len(self.values) != pair_count(len(self.cities)):
+            raise ValueError(
+                f"A table of {len(self.cities)} cities needs "
+                f"{pair_count(len(self.cities))} values, got {len(self.values)}"
+            )
+
+    @classmethod
+    def from_matrix(cls, matrix: DistanceMatrix, double_count=False) -> PairTable:
+        # double_count: If True, reads both (A, B) and (B, A) and keeps the lowest distance.
+        n, distances = matrix.size, matrix.distances
+        values = array("i")
+        if double_count:
+            for hi in range(n):
+                for lo in range(hi):
+                    values.append(
+                        min(distances[lo * n + hi], distances[hi * n + lo])
+                    )
+        else:
+            # The pairs of hi are the start of row hi, copied a slice at a time
+            for hi in range(n):
+                values.extend(distances[hi * n : hi * n + hi])
+        return cls(matrix.cities, values)
+
+    @classmethod
+    def from_pair_dict(
+        cls, cities: Tuple[Hashable, ...], pairs: Mapping[frozenset, int]
+    ) -> PairTable:
+        table = cls(cities, array("i", [UNREACHABLE]) * pair_count(len(cities)))
+        for (a, b), value in pairs.items():
+            table.set(a, b, value)
+        return table
+
+    @property
+    def size(self) -> int:
+        return len(self.cities)
+
+    def __len__(self) -> int:
+        """Number of pairs that have a value."""
+        return len(self.values) - self.values.count(UNREACHABLE)
+
+    def pair_id(self, a: Hashable, b: Hashable) -> int:
+        return pair_id(self.index[a], self.index[b])
+
+    def distance(self, a: Hashable, b: Hashable) -> int:
+        """
+        Value of the pair a, b; UNREACHABLE when it has none. Raises ValueError when
+        a and b are the same city.
+        """
+        return self.values[pair_id(self.index[a], self.index[b])]
+
+    def set(self, a: Hashable, b: Hashable, value: int) -> None:
+        self.values[pair_id(self.index[a], self.index[b])] = value
+
+    def pairs(self) -> Iterator[Tuple[int, int, int]]:
+        """Yield (i, j, value) for every pair with a value, i < j, row by row."""
+        values, n = self.values, len(self.cities)
+        for i in range(n):
+            k = i * (i + 1) // 2 + i
+            for j in range(i + 1, n):
+                value = values[k]
+                if value != UNREACHABLE:
+                    yield i, j, value
+                k += j
+
+    def as_pair_dict(self) -> PairDict:
+        return PairDict(self)
+
+    def to_pair_dict(self) -> Dict[frozenset, int]:
+        cities = self.cities
+        return {frozenset({cities[i], cities[j]}): v for i, j, v in self.pairs()}
+
+
+class PairDict(Mapping):
+    """Read-only {frozenset({a, b}): value} view of a PairTable, for older callers."""
+
+    __slots__ = ("table",)
+
+    def __init__(self, table: PairTable):
+        self.table = table
+
+    def __getitem__(self, key: frozenset) -> int:
+        try:
+            a, b = key
+            value = self.table.distance(a, b)
+        except (TypeError, ValueError, KeyError):
+            raise KeyError(key) from None
+        if value == UNREACHABLE:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[frozenset]:
+        cities = self.table.cities
+        for i, j, _ in self.table.pairs():
+            yield frozenset({cities[i], cities[j]})
+
+    def __len__(self) -> int:
+        return len(self.table)
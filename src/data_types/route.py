@@ -3,27 +3,37 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict
 
-from src.data_types.cities import City, to_city
+from src.data_types.cities import to_city
+from src.data_types.city_registry import AnyCity, CityRegistry
 
 
 @dataclass(frozen=True, slots=True)
 class Route:
-    a: City
-    b: City
+    a: AnyCity
+    b: AnyCity
     value: int
 
     def __post_init__(self):
-        object.__setattr__(self, "a", to_city(self.a))
-        object.__setattr__(self, "b", to_city(self.b))
+        # Names resolve against the City preset; registered cities are kept as given
+        if isinstance(self.a, str):
+            object.__setattr__(self, "a", to_city(self.a))
+        if isinstance(self.b, str):
+            object.__setattr__(self, "b", to_city(self.b))
 
     @classmethod
-    def from_triple(cls, triple: tuple[City | str, City | str, int]) -> Route:
+    def from_triple(cls, triple: tuple[AnyCity | str, AnyCity | str, int]) -> Route:
         a, b, v = triple
         return cls(a, b, v)
 
     @classmethod
-    def from_json(cls, data: Dict[str, Any]) -> Route:
-        return cls(data["a"], data["b"], data["value"])
+    def from_json(
+        cls, data: Dict[str, Any], city_registry: CityRegistry | None = None
+    ) -> Route:
+        if city_registry is None:
+            return cls(data["a"], data["b"], data["value"])
+        return cls(
+            city_registry.get(data["a"]), city_registry.get(data["b"]), data["value"]
+        )
 
     def to_json(self) -> Dict[str, Any]:
         return {"a": self.a.value, "b": self.b.value, "value": self.value}
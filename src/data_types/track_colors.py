@@ -0,0 +1,42 @@
+from enum import Enum
+from typing import Iterable, List
+
+
+class TrackColor(Enum):
+    GREY = "grey"
+    RED = "red"
+    ORANGE = "orange"
+    YELLOW = "yellow"
+    GREEN = "green"
+    BLUE = "blue"
+    PINK = "pink"
+    WHITE = "white"
+    BLACK = "black"
+
+
+def to_track_color(x: TrackColor | str) -> TrackColor:
+    if isinstance(x, TrackColor):
+        return x
+    try:
+        return TrackColor(x.lower())
+    except ValueError:
+        return TrackColor[x.upper()]
+
+
+# Bit i of a color mask is set when the i-th TrackColor is present
+COLOR_BITS = {color: 1 << i for i, color in enumerate(TrackColor)}
+
+# Grey tracks can be claimed with cards of any single color
+WILDCARD_MASK = COLOR_BITS[TrackColor.GREY]
+CARD_COLORS_MASK = (1 << len(TrackColor)) - 1 & ~WILDCARD_MASK
+
+
+def color_mask(colors: Iterable[TrackColor | str]) -> int:
+    mask = 0
+    for color in colors:
+        mask |= COLOR_BITS[to_track_color(color)]
+    return mask
+
+
+def mask_colors(mask: int) -> List[TrackColor]:
+    return [color for color, bit in COLOR_BITS.items() if mask & bit]
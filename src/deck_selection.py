@@ -0,0 +1,246 @@
+import math
+import random
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from src.data_types.pair_table import pair_id
+from src.data_types.route import Route
+
+# Tickets worth at least this much count as long tickets, as in the base game
+LONG_TICKET_VALUE = 20
+
+# Ticket values are compared against the reference deck in bins this wide
+VALUE_BIN_WIDTH = 4
+
+DEFAULT_STEPS = 1_000_000
+
+# Random swaps sampled to pick the starting temperature, and how far it cools
+TEMPERATURE_SAMPLES = 1_000
+FINAL_TEMPERATURE_RATIO = 1e-4
+
+
+@dataclass(frozen=True, slots=True)
+class DeckTargets:
+    """
+    What a good deck looks like, scaled to its size: tickets per value bin, tickets
+    touching each city, and long tickets. Each term of the cost is the squared
+    distance from its target, times its weight.
+    """
+
+    value_bins: Dict[int, float]
+    city_tickets: float
+    long_tickets: float
+    value_weight: float = 1.0
+    coverage_weight: float = 1.0
+    long_weight: float = 1.0
+
+    @classmethod
+    def from_reference(
+        cls,
+        reference: Sequence[Route],
+        size: int,
+        city_count: int,
+        value_weight: float = 1.0,
+        coverage_weight: float = 1.0,
+        long_weight: float = 1.0,
+    ) -> "DeckTargets":
+        """Targets matching the value spread and long/short mix of a reference deck."""
+        if not reference:
+            raise ValueError("The reference deck is empty")
+        scale = size / len(reference)
+        value_bins: Dict[int, float] = {}
+        for route in reference:
+            value_bin = route.value // VALUE_BIN_WIDTH
+            value_bins[value_bin] = value_bins.get(value_bin, 0.0) + scale
+        long_tickets = sum(route.value >= LONG_TICKET_VALUE for route in reference)
+        return cls(
+            value_bins=value_bins,
+            # Every ticket touches two cities
+            city_tickets=2 * size / city_count,
+            long_tickets=long_tickets * scale,
+            value_weight=value_weight,
+            coverage_weight=coverage_weight,
+            long_weight=long_weight,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class DeckSelection:
+    """The chosen deck, pinned tickets first, and how the search went."""
+
+    routes: List[Route]
+    pinned: int
+    cost: float
+    swaps_evaluated: int
+    swaps_accepted: int
+
+
+def select_deck(
+    candidates: Sequence[Route],
+    size: int,
+    targets: DeckTargets,
+    pinned: Sequence[Route] = (),
+    steps: int = DEFAULT_STEPS,
+    seed: int | None = None,
+) -> DeckSelection:
+    """
+    Pick size tickets from candidates by simulated annealing.
+
+    Pinned tickets are always in the deck as given, in place of any candidate for
+    the same pair of cities. Each step proposes swapping one unpinned deck ticket
+    for one outside the deck. The swap is applied to the running value-bin, city
+    and long ticket counts, so its cost change is read off the handful of counts it
+    touches rather than recomputed over the deck, and undone if it is rejected.
+    """
+    candidates = list(candidates)
+    # Dense ids for every city a ticket touches; pairs are keyed by their pair_id
+    city_ids: Dict = {}
+    for route in candidates:
+        city_ids.setdefault(route.a, len(city_ids))
+        city_ids.setdefault(route.b, len(city_ids))
+    by_pair = {}
+    for i, route in enumerate(candidates):
+        a, b = city_ids[route.a], city_ids[route.b]
+        if a != b:
+            by_pair[pair_id(a, b)] = i
+
+    pinned_ids = []
+    for route in pinned:
+        a = city_ids.setdefault(route.a, len(city_ids))
+        b = city_ids.setdefault(route.b, len(city_ids))
+        i = by_pair.get(pair_id(a, b)) if a != b else None
+        if i is None:
+            i = len(candidates)
+            candidates.append(route)
+        else:
+            candidates[i] = route
+        if i not in pinned_ids:
+            pinned_ids.append(i)
+    if len(pinned_ids) > size:
+        raise ValueError(
+            f"{len(pinned_ids)} pinned tickets do not fit a deck of {size}"
+        )
+    if size > len(candidates):
+        raise ValueError(f"Only {len(candidates)} candidates for a deck of {size}")
+
+    # Per-ticket columns: both city ids, value bin and long flag
+    ticket_a = array("i", [city_ids[r.a] for r in candidates])
+    ticket_b = array("i", [city_ids[r.b] for r in candidates])
+    bin_ids = {value_bin: i for i, value_bin in enumerate(targets.value_bins)}
+    ticket_bin = array(
+        "i",
+        [
+            bin_ids.setdefault(r.value // VALUE_BIN_WIDTH, len(bin_ids))
+            for r in candidates
+        ],
+    )
+    ticket_long = array("b", [r.value >= LONG_TICKET_VALUE for r in candidates])
+
+    # Counts are stored minus their targets, so each term is just count ** 2
+    bin_offset = [-targets.value_bins.get(b, 0.0) for b in bin_ids]
+    city_offset = [-targets.city_tickets] * len(city_ids)
+    long_offset = [-targets.long_tickets]
+    value_weight = targets.value_weight
+    coverage_weight = targets.coverage_weight
+    long_weight = targets.long_weight
+
+    rng = random.Random(seed)
+    pinned_set = set(pinned_ids)
+    unpinned = [i for i in range(len(candidates)) if i not in pinned_set]
+    rng.shuffle(unpinned)
+    free_slots = size - len(pinned_ids)
+    # deck holds the swappable tickets, outside every candidate not in the deck
+    deck = unpinned[:free_slots]
+    outside = unpinned[free_slots:]
+
+    for i in pinned_ids + deck:
+        bin_offset[ticket_bin[i]] += 1
+        city_offset[ticket_a[i]] += 1
+        city_offset[ticket_b[i]] += 1
+        long_offset[0] += ticket_long[i]
+
+    def swap_delta(out: int, into: int) -> float:
+        """Move out of the counts and into them, returning the cost change."""
+        delta = 0.0
+        # Removing one from count c changes c ** 2 by 1 - 2c; adding one by 2c + 1
+        c = bin_offset[ticket_bin[out]]
+        delta += value_weight * (1 - 2 * c)
+        bin_offset[ticket_bin[out]] = c - 1
+        c = bin_offset[ticket_bin[into]]
+        delta += value_weight * (2 * c + 1)
+        bin_offset[ticket_bin[into]] = c + 1
+
+        for city in (ticket_a[out], ticket_b[out]):
+            c = city_offset[city]
+            delta += coverage_weight * (1 - 2 * c)
+            city_offset[city] = c - 1
+        for city in (ticket_a[into], ticket_b[into]):
+            c = city_offset[city]
+            delta += coverage_weight * (2 * c + 1)
+            city_offset[city] = c + 1
+
+        change = ticket_long[into] - ticket_long[out]
+        if change:
+            c = long_offset[0]
+            delta += long_weight * (2 * c * change + 1)
+            long_offset[0] = c + change
+        return delta
+
+    evaluated = accepted = 0
+    if deck and outside:
+        # Start hot enough to accept a typical uphill swap about a third of the time
+        uphill = []
+        for _ in range(TEMPERATURE_SAMPLES):
+            out = deck[rng.randrange(free_slots)]
+            into = outside[rng.randrange(len(outside))]
+            delta = swap_delta(out, into)
+            swap_delta(into, out)
+            if delta > 0:
+                uphill.append(delta)
+        temperature = (sum(uphill) / len(uphill) if uphill else 1.0) / math.log(3)
+        cooling = FINAL_TEMPERATURE_RATIO ** (1 / max(steps, 1))
+
+        random_value, log = rng.random, math.log
+        outside_count = len(outside)
+        for _ in range(steps):
+            slot = int(random_value() * free_slots)
+            other = int(random_value() * outside_count)
+            out, into = deck[slot], outside[other]
+            delta = swap_delta(out, into)
+            if delta <= 0 or delta < -temperature * log(1.0 - random_value()):
+                deck[slot], outside[other] = into, out
+                accepted += 1
+            else:
+                swap_delta(into, out)
+            temperature *= cooling
+        evaluated = steps
+
+    cost = (
+        value_weight * sum(c * c for c in bin_offset)
+        + coverage_weight * sum(c * c for c in city_offset)
+        + long_weight * long_offset[0] ** 2
+    )
+    routes = [candidates[i] for i in pinned_ids + deck]
+    return DeckSelection(routes, len(pinned_ids), cost, evaluated, accepted)
+
+
+def deck_cost(deck: Sequence[Route], targets: DeckTargets, cities: Sequence) -> float:
+    """
+    The cost select_deck minimizes, computed from scratch. cities should be every
+    city the candidates touch, as select_deck only knows about those.
+    """
+    value_counts: Dict[int, float] = {b: -t for b, t in targets.value_bins.items()}
+    city_counts = {city: -targets.city_tickets for city in cities}
+    long_count = -targets.long_tickets
+    for route in deck:
+        value_bin = route.value // VALUE_BIN_WIDTH
+        value_counts[value_bin] = value_counts.get(value_bin, 0.0) + 1
+        city_counts[route.a] += 1
+        city_counts[route.b] += 1
+        long_count += route.value >= LONG_TICKET_VALUE
+    return (
+        targets.value_weight * sum(c * c for c in value_counts.values())
+        + targets.coverage_weight * sum(c * c for c in city_counts.values())
+        + targets.long_weight * long_count**2
+    )
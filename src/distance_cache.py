@@ -0,0 +1,130 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from pathlib import Path
+
+from src.all_shortest_lines import ALGORITHM_VERSION, all_shortest_lines
+from src.data_types.distance_matrix import DistanceMatrix
+from src.data_types.graph import Graph
+
+CACHE_DIR = Path(__file__).parent / "output_data" / "cache"
+
+# Layout: header, n*n int32 distances, n*n int32 predecessors, crc32 of both blocks.
+_MAGIC = b"TTRAPSP\x01"
+_HEADER = struct.Struct("<8sI32s")
+_CHECKSUM = struct.Struct("<I")
+_ITEM_SIZE = array("i").itemsize
+
+# Entries kept on disk, most recently used first; each map has its own entry, so
+# this leaves room for the US map, bundles and generated maps used side by side
+MAX_CACHE_ENTRIES = 8
+
+
+def map_digest(city_map: Graph) -> bytes:
+    """Hash everything the distance matrix depends on: the map content and the engine."""
+    digest = hashlib.sha256()
+    digest.update(f"{ALGORITHM_VERSION}|{sys.byteorder}|{_ITEM_SIZE}".encode())
+    for city in city_map.cities:
+        digest.update(str(getattr(city, "value", city)).encode())
+        digest.update(b"\0")
+    for values in (city_map.offsets, city_map.neighbors, city_map.weights):
+        digest.update(array("i", values).tobytes())
+    return digest.digest()
+
+
+def cached_all_shortest_lines(
+    city_map: Graph, cache_dir: Path = CACHE_DIR
+) -> DistanceMatrix:
+    """
+    Return the all-pairs distance matrix for city_map, reusing an on-disk copy when
+    one exists for the same map content. Hits are memory-mapped rather than parsed;
+    missing, stale or corrupt entries are recomputed and rewritten.
+    """
+    key = map_digest(city_map)
+    cache_path = cache_dir / f"apsp-{key.hex()[:16]}.bin"
+
+    matrix = _read_cache(cache_path, key, city_map)
+    if matrix is not None:
+        return matrix
+
+    matrix = all_shortest_lines(city_map)
+    _write_cache(cache_path, key, matrix)
+    return matrix
+
+
+def _read_cache(cache_path: Path, key: bytes, city_map: Graph) -> DistanceMatrix | None:
+    n = len(city_map)
+    block_size = n * n * _ITEM_SIZE
+    expected_size = _HEADER.size + 2 * block_size + _CHECKSUM.size
+
+    try:
+        with open(cache_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size != expected_size:
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    magic, count, stored_key = _HEADER.unpack_from(mapped, 0)
+    view = memoryview(mapped)
+    payload = view[_HEADER.size : _HEADER.size + 2 * block_size]
+    (checksum,) = _CHECKSUM.unpack_from(mapped, _HEADER.size + 2 * block_size)
+    if magic != _MAGIC or count != n or stored_key != key or zlib.crc32(payload) != checksum:
+        payload.release()
+        view.release()
+        mapped.close()
+        return None
+
+    # Mark the entry as recently used so pruning keeps it
+    try:
+        os.utime(cache_path)
+    except OSError:
+        pass
+
+    distances = payload[:block_size].cast("i")
+    predecessors = payload[block_size:].cast("i")
+    return DistanceMatrix(city_map.cities, distances, predecessors)
+
+
+def _write_cache(cache_path: Path, key: bytes, matrix: DistanceMatrix) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    distances = array("i", matrix.distances).tobytes()
+    predecessors = array("i", matrix.predecessors).tobytes()
+    checksum = zlib.crc32(predecessors, zlib.crc32(distances))
+
+    # Write to a temporary file of our own and swap it in, so readers never see a
+    # partial entry and concurrent writers of the same map never share one
+    f = tempfile.NamedTemporaryFile(
+        dir=cache_path.parent, prefix=cache_path.stem, suffix=".tmp", delete=False
+    )
+    tmp_path = Path(f.name)
+    try:
+        with f:
+            f.write(_HEADER.pack(_MAGIC, matrix.size, key))
+            f.write(distances)
+            f.write(predecessors)
+            f.write(_CHECKSUM.pack(checksum))
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    _prune_cache(cache_path.parent)
+
+
+def _prune_cache(cache_dir: Path, keep: int = MAX_CACHE_ENTRIES) -> None:
+    """Drop all but the keep most recently used entries."""
+    entries = []
+    for path in cache_dir.glob("apsp-*.bin"):
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except OSError:
+            continue
+    entries.sort(reverse=True)
+    for _, stale_path in entries[keep:]:
+        stale_path.unlink(missing_ok=True)
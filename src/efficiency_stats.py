@@ -0,0 +1,219 @@
+import math
+from array import array
+from dataclasses import dataclass, replace
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from src.data_types.distance_matrix import UNREACHABLE, DistanceMatrix
+from src.data_types.route import Route
+
+DEFAULT_PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+DEFAULT_BINS = 10
+
+# Tukey's fences: ratios further than this many interquartile ranges outside the
+# middle half of the deck are outliers
+OUTLIER_IQR_FACTOR = 1.5
+
+
+@dataclass(frozen=True, slots=True)
+class DeckArrays:
+    """A deck as parallel columns: city ids, ticket values and shortest distances."""
+
+    a: array
+    b: array
+    values: array
+    distances: array
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+@dataclass(frozen=True, slots=True)
+class DeckEfficiency:
+    """
+    Efficiency (value / shortest distance) statistics of one deck. Tickets whose
+    cities are not connected are counted in unreachable and left out of the rest.
+    ratios are sorted; outliers holds ticket positions in the deck, lowest ratio first.
+    """
+
+    name: str
+    tickets: int
+    unreachable: int
+    ratios: array
+    mean: float
+    median: float
+    stdev: float
+    minimum: float
+    maximum: float
+    percentiles: Dict[int, float]
+    histogram_edges: Tuple[float, ...]
+    histogram_counts: Tuple[int, ...]
+    outlier_fences: Tuple[float, float]
+    outliers: Tuple[int, ...]
+
+    def to_json(self) -> Dict:
+        return {
+            "name": self.name,
+            "tickets": self.tickets,
+            "unreachable": self.unreachable,
+            "mean": self.mean,
+            "median": self.median,
+            "stdev": self.stdev,
+            "min": self.minimum,
+            "max": self.maximum,
+            "percentiles": {str(p): v for p, v in self.percentiles.items()},
+            "histogram": {
+                "edges": list(self.histogram_edges),
+                "counts": list(self.histogram_counts),
+            },
+            "outlier_fences": list(self.outlier_fences),
+            "outliers": list(self.outliers),
+        }
+
+
+def deck_arrays(deck: Sequence[Route], matrix: DistanceMatrix) -> DeckArrays:
+    """Look up every ticket's shortest distance straight from the flat matrix."""
+    index, n, distances = matrix.index, matrix.size, matrix.distances
+    a = array("i", [index[route.a] for route in deck])
+    b = array("i", [index[route.b] for route in deck])
+    return DeckArrays(
+        a,
+        b,
+        array("i", [route.value for route in deck]),
+        array("i", [distances[i * n + j] for i, j in zip(a, b)]),
+    )
+
+
+def analyze_deck(
+    deck: Sequence[Route] | DeckArrays,
+    matrix: DistanceMatrix | None = None,
+    name: str = "deck",
+    percentiles: Sequence[int] = DEFAULT_PERCENTILES,
+    bins: int = DEFAULT_BINS,
+) -> DeckEfficiency:
+    """Statistics of one deck, given as routes (with matrix) or as DeckArrays."""
+    if not isinstance(deck, DeckArrays):
+        if matrix is None:
+            raise ValueError("A distance matrix is needed to analyze a list of routes")
+        deck = deck_arrays(deck, matrix)
+
+    reachable = [
+        (value / distance, i)
+        for i, (value, distance) in enumerate(zip(deck.values, deck.distances))
+        if distance != UNREACHABLE and distance > 0
+    ]
+    if not reachable:
+        raise ValueError(f"Deck {name!r} has no tickets between connected cities")
+
+    # Sorting (ratio, position) pairs once serves every order statistic below
+    reachable.sort()
+    ordered = array("d", [ratio for ratio, _ in reachable])
+    count = len(ordered)
+    mean = math.fsum(ordered) / count
+    stdev = math.sqrt(math.fsum((r - mean) ** 2 for r in ordered) / count)
+
+    q1, q3 = _percentile(ordered, 25), _percentile(ordered, 75)
+    spread = OUTLIER_IQR_FACTOR * (q3 - q1)
+    low_fence, high_fence = q1 - spread, q3 + spread
+    outliers = tuple(
+        position
+        for ratio, position in reachable
+        if ratio < low_fence or ratio > high_fence
+    )
+
+    edges, counts = _histogram(ordered, bins)
+    return DeckEfficiency(
+        name=name,
+        tickets=len(deck),
+        unreachable=len(deck) - count,
+        ratios=ordered,
+        mean=mean,
+        median=_percentile(ordered, 50),
+        stdev=stdev,
+        minimum=ordered[0],
+        maximum=ordered[-1],
+        percentiles={p: _percentile(ordered, p) for p in percentiles},
+        histogram_edges=edges,
+        histogram_counts=counts,
+        outlier_fences=(low_fence, high_fence),
+        outliers=outliers,
+    )
+
+
+def compare_decks(
+    decks: Mapping[str, Sequence[Route] | DeckArrays],
+    matrix: DistanceMatrix,
+    percentiles: Sequence[int] = DEFAULT_PERCENTILES,
+    bins: int = DEFAULT_BINS,
+) -> List[DeckEfficiency]:
+    """
+    Analyze several decks against the same map. Histograms share one set of bin
+    edges spanning every deck so their counts line up.
+    """
+    arrays = {
+        name: deck if isinstance(deck, DeckArrays) else deck_arrays(deck, matrix)
+        for name, deck in decks.items()
+    }
+    results = [
+        analyze_deck(deck, name=name, percentiles=percentiles, bins=bins)
+        for name, deck in arrays.items()
+    ]
+    low = min(result.minimum for result in results)
+    high = max(result.maximum for result in results)
+    return [_rebin(result, low, high, bins) for result in results]
+
+
+def format_comparison(results: Sequence[DeckEfficiency]) -> str:
+    """Side-by-side table of the headline statistics of each deck."""
+    rows: List[Tuple[str, ...]] = [("",) + tuple(r.name for r in results)]
+    rows.append(("tickets",) + tuple(str(r.tickets) for r in results))
+    rows.append(("unreachable",) + tuple(str(r.unreachable) for r in results))
+    for label, attribute in (
+        ("mean", "mean"),
+        ("median", "median"),
+        ("stdev", "stdev"),
+        ("min", "minimum"),
+        ("max", "maximum"),
+    ):
+        rows.append((label,) + tuple(f"{getattr(r, attribute):.4f}" for r in results))
+    for p in results[0].percentiles:
+        rows.append(
+            (f"p{p}",) + tuple(f"{r.percentiles.get(p, math.nan):.4f}" for r in results)
+        )
+    rows.append(("outliers",) + tuple(str(len(r.outliers)) for r in results))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows
+    )
+
+
+def _percentile(ordered: Sequence[float], p: float) -> float:
+    """Linearly interpolated percentile of already sorted values."""
+    position = (len(ordered) - 1) * p / 100
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _histogram(
+    ordered: Sequence[float],
+    bins: int,
+    low: float | None = None,
+    high: float | None = None,
+) -> Tuple[Tuple[float, ...], Tuple[int, ...]]:
+    """Equal-width bins over [low, high]; the last bin includes high."""
+    low = ordered[0] if low is None else low
+    high = ordered[-1] if high is None else high
+    width = (high - low) / bins or 1.0
+    counts = array("i", [0] * bins)
+    for ratio in ordered:
+        counts[min(int((ratio - low) / width), bins - 1)] += 1
+    edges = tuple(low + width * i for i in range(bins)) + (high,)
+    return edges, tuple(counts)
+
+
+def _rebin(
+    result: DeckEfficiency, low: float, high: float, bins: int
+) -> DeckEfficiency:
+    edges, counts = _histogram(result.ratios, bins, low, high)
+    return replace(result, histogram_edges=edges, histogram_counts=counts)
@@ -0,0 +1,434 @@
+import heapq
+import os
+import random
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+from src.data_types.distance_matrix import UNREACHABLE
+from src.data_types.graph import Graph
+from src.data_types.route import Route
+
+DEFAULT_PLAYERS = 4
+DEFAULT_TICKETS_PER_PLAYER = 3
+DEFAULT_TRAINS = 45
+DEFAULT_BATCH_SIZE = 500
+
+# The last round starts once a player is down to this many trains
+LAST_ROUND_TRAINS = 2
+
+# With fewer players than this only one track of a double connection can be claimed
+DOUBLE_TRACK_MIN_PLAYERS = 4
+
+# Chance a player claims a track on their turn rather than drawing cards
+CLAIM_PROBABILITY = 0.5
+
+
+@dataclass(frozen=True, slots=True)
+class SimulationMap:
+    """
+    The map as the simulator plays it: one slot per connection with its length and
+    track count, and per city the (neighbor, connection) pairs leaving it.
+    """
+
+    lengths: array
+    tracks: array
+    adjacency: Tuple[Tuple[Tuple[int, int], ...], ...]
+
+    @classmethod
+    def from_graph(cls, city_map: Graph) -> "SimulationMap":
+        lengths, tracks = array("i"), array("B")
+        adjacency: List[List[Tuple[int, int]]] = [[] for _ in range(len(city_map))]
+        offsets, neighbors = city_map.offsets, city_map.neighbors
+        for i in range(len(city_map)):
+            for e in range(offsets[i], offsets[i + 1]):
+                j = neighbors[e]
+                if i < j:
+                    connection = len(lengths)
+                    lengths.append(city_map.weights[e])
+                    tracks.append(city_map.tracks[e])
+                    adjacency[i].append((j, connection))
+                    adjacency[j].append((i, connection))
+        return cls(lengths, tracks, tuple(tuple(pairs) for pairs in adjacency))
+
+
+@dataclass(frozen=True, slots=True)
+class GameRules:
+    """Table size, tickets dealt to each player and each player's train supply."""
+
+    players: int = DEFAULT_PLAYERS
+    tickets_per_player: int = DEFAULT_TICKETS_PER_PLAYER
+    trains: int = DEFAULT_TRAINS
+
+
+@dataclass(frozen=True, slots=True)
+class TicketOdds:
+    """
+    How one ticket fared over every game it was dealt in. trains counts, per number
+    of trains, the completions whose connecting line used that many.
+    """
+
+    route: Route
+    dealt: int
+    completed: int
+    trains: Dict[int, int]
+
+    @property
+    def completion_rate(self) -> float:
+        return self.completed / self.dealt if self.dealt else 0.0
+
+    @property
+    def mean_trains(self) -> float:
+        if not self.completed:
+            return 0.0
+        return sum(t * n for t, n in self.trains.items()) / self.completed
+
+    def to_json(self) -> Dict:
+        return {
+            "a": self.route.a.value,
+            "b": self.route.b.value,
+            "value": self.route.value,
+            "dealt": self.dealt,
+            "completed": self.completed,
+            "completion_rate": self.completion_rate,
+            "mean_trains": self.mean_trains,
+            "trains": {str(t): n for t, n in sorted(self.trains.items())},
+        }
+
+
+def simulate_games(
+    deck: Sequence[Route],
+    city_map: Graph,
+    games: int,
+    rules: GameRules = GameRules(),
+    seed: int = 0,
+    workers: int | None = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[TicketOdds]:
+    """
+    Play a number of simplified games and report each ticket's completion odds.
+
+    Players are dealt tickets from the deck and take turns either drawing (a
+    skipped turn) or claiming one track toward their current ticket, along the
+    cheapest line over their own and still open tracks. When another player takes
+    the last open track on that line, the player reroutes; a ticket with no line
+    left, or one longer than the trains remaining, is given up.
+
+    Games are played in batches of batch_size, each seeded from seed and its batch
+    number, so the results do not depend on how many processes play them.
+    workers: Number of processes to play with. None uses every CPU core.
+    """
+    if rules.players * rules.tickets_per_player > len(deck):
+        raise ValueError(
+            f"A deck of {len(deck)} tickets cannot deal {rules.tickets_per_player} "
+            f"to each of {rules.players} players"
+        )
+    simulation_map = SimulationMap.from_graph(city_map)
+    index = city_map.index
+    tickets = tuple((index[route.a], index[route.b]) for route in deck)
+    batches = [
+        (batch, min(batch_size, games - start))
+        for batch, start in enumerate(range(0, games, batch_size))
+    ]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_simulation_worker,
+            initargs=(simulation_map, tickets, rules, seed),
+        ) as executor:
+            results = list(executor.map(_simulation_worker_task, batches))
+    else:
+        results = [
+            _play_batch(simulation_map, tickets, rules, seed, batch, count)
+            for batch, count in batches
+        ]
+
+    dealt = [0] * len(deck)
+    completed = [0] * len(deck)
+    trains = [Counter() for _ in deck]
+    for batch_dealt, batch_completed, batch_trains in results:
+        for i in range(len(deck)):
+            dealt[i] += batch_dealt[i]
+            completed[i] += batch_completed[i]
+        for i, counts in batch_trains.items():
+            trains[i].update(counts)
+    return [
+        TicketOdds(route, dealt[i], completed[i], dict(trains[i]))
+        for i, route in enumerate(deck)
+    ]
+
+
+def format_ticket_odds(odds: Sequence[TicketOdds]) -> str:
+    """One row per ticket, least often completed first."""
+    rows = [("ticket", "value", "dealt", "completed", "rate", "trains")]
+    for ticket in sorted(odds, key=lambda t: t.completion_rate):
+        rows.append(
+            (
+                f"{ticket.route.a.value} - {ticket.route.b.value}",
+                str(ticket.route.value),
+                str(ticket.dealt),
+                str(ticket.completed),
+                f"{ticket.completion_rate:.4f}",
+                f"{ticket.mean_trains:.2f}",
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    )
+
+
+_worker_state: dict = {}
+
+
+def _init_simulation_worker(
+    simulation_map: SimulationMap,
+    tickets: Tuple[Tuple[int, int], ...],
+    rules: GameRules,
+    seed: int,
+) -> None:
+    _worker_state["map"] = simulation_map
+    _worker_state["tickets"] = tickets
+    _worker_state["rules"] = rules
+    _worker_state["seed"] = seed
+
+
+def _simulation_worker_task(batch: Tuple[int, int]):
+    return _play_batch(
+        _worker_state["map"],
+        _worker_state["tickets"],
+        _worker_state["rules"],
+        _worker_state["seed"],
+        *batch,
+    )
+
+
+def _play_batch(
+    simulation_map: SimulationMap,
+    tickets: Tuple[Tuple[int, int], ...],
+    rules: GameRules,
+    seed: int,
+    batch: int,
+    games: int,
+) -> Tuple[List[int], List[int], Dict[int, Counter]]:
+    rng = random.Random(f"{seed}:{batch}")
+    dealt = [0] * len(tickets)
+    completed = [0] * len(tickets)
+    trains: Dict[int, Counter] = {}
+    for _ in range(games):
+        for ticket, used in _play_game(simulation_map, tickets, rules, rng):
+            dealt[ticket] += 1
+            if used is not None:
+                completed[ticket] += 1
+                trains.setdefault(ticket, Counter())[used] += 1
+    return dealt, completed, trains
+
+
+def _play_game(
+    simulation_map: SimulationMap,
+    tickets: Tuple[Tuple[int, int], ...],
+    rules: GameRules,
+    rng: random.Random,
+) -> List[Tuple[int, int | None]]:
+    """
+    Play one game. Returns (ticket, trains used) per dealt ticket, with None for
+    trains used when the ticket was not completed.
+    """
+    lengths = simulation_map.lengths
+    players = rules.players
+    if players < DOUBLE_TRACK_MIN_PLAYERS:
+        open_tracks = array("B", [1]) * len(lengths)
+    else:
+        open_tracks = array("B", simulation_map.tracks)
+    owners = [0] * len(lengths)
+
+    # Tickets are dealt without replacement across the table
+    drawn = rng.sample(range(len(tickets)), players * rules.tickets_per_player)
+    hands = [
+        drawn[p * rules.tickets_per_player : (p + 1) * rules.tickets_per_player]
+        for p in range(players)
+    ]
+    trains_left = [rules.trains] * players
+    # Per player: position of the ticket pursued, and its planned line as a list
+    # of connections (owned ones included)
+    pursuing = [0] * players
+    plans: List[List[int] | None] = [None] * players
+    results: List[Dict[int, int | None]] = [{} for _ in range(players)]
+
+    last_round_from = None
+    turn = rng.randrange(players)
+    idle = 0
+    while idle < players:
+        player = turn % players
+        turn += 1
+        if last_round_from is not None and player == last_round_from:
+            break
+
+        acted = _take_turn(
+            simulation_map,
+            tickets,
+            player,
+            hands[player],
+            pursuing,
+            plans,
+            results[player],
+            open_tracks,
+            owners,
+            trains_left,
+            rng,
+        )
+        idle = 0 if acted else idle + 1
+        if last_round_from is None and trains_left[player] <= LAST_ROUND_TRAINS:
+            last_round_from = player
+
+    outcome = []
+    for player, hand in enumerate(hands):
+        for ticket in hand:
+            used = results[player].get(ticket)
+            if used is None:
+                # Tickets given up on or never reached may still be joined up
+                used = _line_length(simulation_map, tickets[ticket], player, owners)
+            outcome.append((ticket, used))
+    return outcome
+
+
+def _take_turn(
+    simulation_map: SimulationMap,
+    tickets: Tuple[Tuple[int, int], ...],
+    player: int,
+    hand: List[int],
+    pursuing: List[int],
+    plans: List[List[int] | None],
+    results: Dict[int, int | None],
+    open_tracks: array,
+    owners: List[int],
+    trains_left: List[int],
+    rng: random.Random,
+) -> bool:
+    """Play one turn; False once the player has nothing left to pursue."""
+    lengths = simulation_map.lengths
+    mine = 1 << player
+    while pursuing[player] < len(hand):
+        ticket = hand[pursuing[player]]
+        plan = plans[player]
+        # Reroute when another player has closed a connection on the planned line
+        if plan is None or any(
+            not owners[c] & mine and not open_tracks[c] for c in plan
+        ):
+            plan = _plan_line(
+                simulation_map, tickets[ticket], player, open_tracks, owners
+            )
+            if plan is not None:
+                cost = sum(lengths[c] for c in plan if not owners[c] & mine)
+                if cost > trains_left[player]:
+                    plan = None
+            plans[player] = plan
+        if plan is None:
+            results[ticket] = None
+            pursuing[player] += 1
+            continue
+
+        to_claim = [c for c in plan if not owners[c] & mine]
+        if not to_claim:
+            results[ticket] = sum(lengths[c] for c in plan)
+            pursuing[player] += 1
+            plans[player] = None
+            continue
+
+        if rng.random() < CLAIM_PROBABILITY:
+            connection = to_claim[int(rng.random() * len(to_claim))]
+            owners[connection] |= mine
+            open_tracks[connection] -= 1
+            trains_left[player] -= lengths[connection]
+            if len(to_claim) == 1:
+                results[ticket] = sum(lengths[c] for c in plan)
+                pursuing[player] += 1
+                plans[player] = None
+        return True
+    return False
+
+
+def _plan_line(
+    simulation_map: SimulationMap,
+    ticket: Tuple[int, int],
+    player: int,
+    open_tracks: array,
+    owners: List[int],
+) -> List[int] | None:
+    """
+    Cheapest line for the ticket over the player's own connections (free) and
+    connections with an open track the player does not already hold.
+    """
+    start, end = ticket
+    lengths, adjacency = simulation_map.lengths, simulation_map.adjacency
+    mine = 1 << player
+    cost = [UNREACHABLE] * len(adjacency)
+    cost[start] = 0
+    via_city = [0] * len(adjacency)
+    via_connection = [0] * len(adjacency)
+    heap = [(0, start)]
+    pop, push = heapq.heappop, heapq.heappush
+    while heap:
+        current_cost, city = pop(heap)
+        if city == end:
+            break
+        if current_cost != cost[city]:
+            continue
+        for neighbor, connection in adjacency[city]:
+            if owners[connection] & mine:
+                next_cost = current_cost
+            elif open_tracks[connection]:
+                next_cost = current_cost + lengths[connection]
+            else:
+                continue
+            if next_cost < cost[neighbor]:
+                cost[neighbor] = next_cost
+                via_city[neighbor] = city
+                via_connection[neighbor] = connection
+                push(heap, (next_cost, neighbor))
+    else:
+        return None
+
+    line = []
+    city = end
+    while city != start:
+        line.append(via_connection[city])
+        city = via_city[city]
+    return line
+
+
+def _line_length(
+    simulation_map: SimulationMap,
+    ticket: Tuple[int, int],
+    player: int,
+    owners: List[int],
+) -> int | None:
+    """Length of the shortest line joining the ticket over the player's own tracks."""
+    start, end = ticket
+    lengths, adjacency = simulation_map.lengths, simulation_map.adjacency
+    mine = 1 << player
+    cost = {start: 0}
+    heap = [(0, start)]
+    while heap:
+        current_cost, city = heapq.heappop(heap)
+        if city == end:
+            return current_cost
+        if current_cost != cost[city]:
+            continue
+        for neighbor, connection in adjacency[city]:
+            if owners[connection] & mine:
+                next_cost = current_cost + lengths[connection]
+                if next_cost < cost.get(neighbor, next_cost + 1):
+                    cost[neighbor] = next_cost
+                    heapq.heappush(heap, (next_cost, neighbor))
+    return None
@@ -1,3 +1,4 @@
+from src.image_processing.deck_overview import visualize_deck_overview
 from src.image_processing.visualize_route import visualize_route
 
-__all__ = ["visualize_route"]
+__all__ = ["visualize_route", "visualize_deck_overview"]
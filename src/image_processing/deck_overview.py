@@ -0,0 +1,278 @@
+from array import array
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from PIL import Image, ImageDraw
+
+from src.all_shortest_lines import all_shortest_lines
+from src.data_types.distance_matrix import NO_PREDECESSOR, UNREACHABLE, DistanceMatrix
+from src.data_types.graph import Graph
+from src.data_types.pair_table import pair_count, pair_id
+from src.data_types.route import Route
+from src.image_processing.route_layout import (
+    ANTIALIASING_SCALE,
+    BLACK,
+    DOT_SIZE,
+    FONT_PATH,
+    HEADER_HEIGHT,
+    HEADER_TEXT_Y_OFFSET,
+    LINE_WIDTH,
+    RED,
+    curve_control_point,
+    fit_header_font_size,
+    load_font,
+    text_bbox,
+)
+from src.image_processing.projection import (
+    Equirectangular,
+    Projection,
+    city_pixel_positions,
+)
+from src.image_processing.visualize_route import (
+    OUTPUT_DIR,
+    _file_digest,
+    _prepare_base_image,
+)
+from src.track_criticality import TrackCriticality, deck_pairs, track_criticality
+
+# Heat ramp from rarely to most used, with matching opacity
+LOW_USE_COLOR = (255, 200, 0)
+HIGH_USE_COLOR = RED
+LOW_USE_ALPHA = 90
+HIGH_USE_ALPHA = 255
+
+# Line width relative to LINE_WIDTH for the least and most used lines
+MIN_WIDTH_SCALE = 0.3
+MAX_WIDTH_SCALE = 1.0
+
+# Points per drawn route curve
+CURVE_SEGMENTS = 20
+
+
+def visualize_deck_overview(
+    routes: Iterable[Route] | None,
+    city_map: Graph,
+    map_path: str,
+    bounds: dict | None = None,
+    by: str = "routes",
+    matrix: DistanceMatrix | None = None,
+    output_path: str | Path | None = None,
+    projection: Projection | None = None,
+    criticality: Sequence[TrackCriticality] | None = None,
+) -> str:
+    """
+    Draw a whole deck onto one map, with each line's width and heat scaled by how
+    often it is used. Usage is counted in flat arrays first and all lines are drawn
+    onto a single supersampled overlay that is composited and encoded once.
+
+    Args:
+        routes: Deck to summarize. With by="tracks" this may be None to count the
+                shortest line between every pair of cities instead.
+        city_map: Map graph with city coordinates (from build_map())
+        map_path: Path to the map image file
+        bounds: Map bounds, as for visualize_route
+        by: "routes" draws one curve per city pair in the deck; "tracks" follows each
+            pair's shortest line and heats the individual tracks it uses;
+            "criticality" heats each track by how many of the deck's tickets (or,
+            without a deck, city pairs) get a longer line when it is removed
+        matrix: All-pairs distances with predecessors, computed if not given
+        output_path: Where to save the JPEG. Defaults to deck_overview.jpeg in OUTPUT_DIR.
+        projection: How coordinates are placed on the map, as for visualize_route
+        criticality: Reports from track_criticality for by="criticality", computed
+                     from matrix if not given
+
+    Returns:
+        str: Path to the saved image
+    """
+    if bounds is None:
+        bounds = {
+            "min_lat": -90.0,
+            "max_lat": 90.0,
+            "min_lon": -180.0,
+            "max_lon": 180.0,
+        }
+    if output_path is None:
+        output_path = OUTPUT_DIR / "deck_overview.jpeg"
+    if projection is None:
+        projection = Equirectangular()
+
+    if by == "routes":
+        if routes is None:
+            raise ValueError("A route deck is required to count city pairs")
+        counts = _count_route_pairs(routes, city_map)
+        lines = _pair_lines(counts, len(city_map))
+        title = "Deck overview: routes"
+    elif by == "tracks":
+        if matrix is None:
+            matrix = all_shortest_lines(city_map)
+        counts = _count_track_use(routes, city_map, matrix)
+        lines = [
+            (i, j, counts[k])
+            for k, (i, j, _) in enumerate(city_map.edges())
+            if counts[k]
+        ]
+        title = "Deck overview: tracks"
+    elif by == "criticality":
+        if criticality is None:
+            if matrix is None:
+                matrix = all_shortest_lines(city_map)
+            criticality = track_criticality(city_map, matrix)
+        if routes is None:
+            scores = [(r, r.affected_pairs) for r in criticality]
+        else:
+            pairs = deck_pairs(list(routes), city_map)
+            scores = [(r, r.affected_tickets(pairs)[0]) for r in criticality]
+        lines = [(r.a, r.b, score) for r, score in scores if score]
+        title = "Deck overview: track criticality"
+    else:
+        raise ValueError(f"Unknown overview mode: {by}")
+
+    base_img = _prepare_base_image(Image.open(map_path))
+    positions = city_pixel_positions(
+        city_map, base_img.size, bounds, projection, _file_digest(map_path)
+    )
+
+    _draw_heat_overlay(base_img, lines, positions, curved=by == "routes")
+    _draw_title(base_img, title)
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    base_img.save(output_path, "JPEG", quality=95)
+    return str(output_path)
+
+
+def _count_route_pairs(routes: Iterable[Route], city_map: Graph) -> array:
+    n = len(city_map)
+    counts = array("i", bytes(array("i").itemsize * pair_count(n)))
+    index = city_map.index
+    for route in routes:
+        i, j = index[route.a], index[route.b]
+        if i != j:
+            counts[pair_id(i, j)] += 1
+    return counts
+
+
+def _pair_lines(counts: array, n: int) -> list[tuple[int, int, int]]:
+    lines = []
+    for i in range(n):
+        for j in range(i + 1, n):
+            count = counts[pair_id(i, j)]
+            if count:
+                lines.append((i, j, count))
+    return lines
+
+
+def _count_track_use(
+    routes: Iterable[Route] | None,
+    city_map: Graph,
+    matrix: DistanceMatrix,
+) -> array:
+    """Count how many shortest lines run over each track, in city_map.edges() order."""
+    n = len(city_map)
+    edge_index = {(i, j): k for k, (i, j, _) in enumerate(city_map.edges())}
+    counts = array("i", bytes(array("i").itemsize * len(edge_index)))
+    distances, predecessors = matrix.distances, matrix.predecessors
+
+    if routes is not None:
+        for route in routes:
+            s, t = matrix.index[route.a], matrix.index[route.b]
+            if distances[s * n + t] == UNREACHABLE:
+                continue
+            while t != s:
+                p = predecessors[s * n + t]
+                counts[edge_index[(p, t) if p < t else (t, p)]] += 1
+                t = p
+        return counts
+
+    # Every pair: the track into t in the shortest line tree of s carries the lines
+    # from s to every city in t's subtree. Only cities after s are counted so each
+    # unordered pair is counted once.
+    for s in range(n):
+        base = s * n
+        reachable = [t for t in range(n) if distances[base + t] != UNREACHABLE]
+        # Children are farther than their parents, so this visits subtrees first
+        reachable.sort(key=lambda t: distances[base + t], reverse=True)
+        subtree = [1 if t > s else 0 for t in range(n)]
+        for t in reachable:
+            p = predecessors[base + t]
+            if p == NO_PREDECESSOR:
+                continue
+            subtree[p] += subtree[t]
+            counts[edge_index[(p, t) if p < t else (t, p)]] += subtree[t]
+    return counts
+
+
+def _heat(fraction: float) -> tuple[int, int, int, int]:
+    r, g, b = (
+        round(low + (high - low) * fraction)
+        for low, high in zip(LOW_USE_COLOR, HIGH_USE_COLOR)
+    )
+    alpha = round(LOW_USE_ALPHA + (HIGH_USE_ALPHA - LOW_USE_ALPHA) * fraction)
+    return (r, g, b, alpha)
+
+
+def _draw_heat_overlay(
+    img: Image.Image,
+    lines: list[tuple[int, int, int]],
+    positions: list[tuple[float, float] | None],
+    curved: bool,
+) -> None:
+    """Draw every line on one supersampled overlay and composite it onto img once."""
+    overlay = Image.new(
+        "RGBA",
+        (img.width * ANTIALIASING_SCALE, img.height * ANTIALIASING_SCALE),
+        (0, 0, 0, 0),
+    )
+    draw = ImageDraw.Draw(overlay)
+    max_count = max((count for _, _, count in lines), default=1)
+    used_cities = set()
+
+    # Least used first, so the busiest lines end up on top
+    for i, j, count in sorted(lines, key=lambda line: line[2]):
+        if positions[i] is None or positions[j] is None:
+            continue
+        used_cities.update((i, j))
+        fraction = count / max_count
+        width = LINE_WIDTH * (
+            MIN_WIDTH_SCALE + (MAX_WIDTH_SCALE - MIN_WIDTH_SCALE) * fraction
+        )
+        (x1, y1), (x2, y2) = positions[i], positions[j]
+        if curved:
+            ctrl_x, ctrl_y = curve_control_point(x1, y1, x2, y2)
+            points = []
+            for step in range(CURVE_SEGMENTS + 1):
+                t = step / CURVE_SEGMENTS
+                points.append(
+                    (
+                        (1 - t) ** 2 * x1 + 2 * (1 - t) * t * ctrl_x + t**2 * x2,
+                        (1 - t) ** 2 * y1 + 2 * (1 - t) * t * ctrl_y + t**2 * y2,
+                    )
+                )
+        else:
+            points = [(x1, y1), (x2, y2)]
+        draw.line(
+            [(x * ANTIALIASING_SCALE, y * ANTIALIASING_SCALE) for x, y in points],
+            fill=_heat(fraction),
+            width=max(1, round(width * ANTIALIASING_SCALE)),
+            joint="curve",
+        )
+
+    dot_radius = DOT_SIZE * ANTIALIASING_SCALE / 2.0
+    for i in used_cities:
+        x, y = positions[i]
+        x, y = x * ANTIALIASING_SCALE, y * ANTIALIASING_SCALE
+        draw.ellipse(
+            [(x - dot_radius, y - dot_radius), (x + dot_radius, y + dot_radius)],
+            fill=BLACK,
+        )
+
+    overlay = overlay.resize(img.size, Image.Resampling.LANCZOS)
+    img.paste(overlay, (0, 0), overlay)
+
+
+def _draw_title(img: Image.Image, title: str) -> None:
+    font_size = fit_header_font_size(title, img.width)
+    bbox = text_bbox(title, font_size)
+    text_x = (img.width - (bbox[2] - bbox[0])) // 2
+    text_y = (HEADER_HEIGHT - (bbox[3] - bbox[1])) // 2 - HEADER_TEXT_Y_OFFSET
+    font = load_font(str(FONT_PATH), font_size)
+    ImageDraw.Draw(img).text((text_x, text_y), title, fill=BLACK, font=font)
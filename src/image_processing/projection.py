@@ -0,0 +1,245 @@
+import hashlib
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from src.data_types.graph import Graph
+from src.image_processing.route_layout import HEADER_HEIGHT
+
+CACHE_DIR = Path(__file__).parent.parent / "output_data" / "cache"
+
+# Points sampled along each edge of the bounds when fitting a curved projection
+BOUNDS_EDGE_SAMPLES = 32
+
+PixelPositions = List[Tuple[float, float] | None]
+
+
+@dataclass(frozen=True, slots=True)
+class Equirectangular:
+    """Longitude and latitude map linearly onto the area below the header."""
+
+    def to_pixels(
+        self,
+        coordinates: Sequence[Tuple[float, float]],
+        image_width: int,
+        image_height: int,
+        bounds: dict,
+    ) -> List[Tuple[float, float]]:
+        # Same arithmetic as lat_lon_to_pixel, so cards come out identical
+        min_lon, max_lon = bounds["min_lon"], bounds["max_lon"]
+        min_lat, max_lat = bounds["min_lat"], bounds["max_lat"]
+        map_height = image_height - HEADER_HEIGHT
+        return [
+            (
+                ((lon - min_lon) / (max_lon - min_lon)) * image_width,
+                ((max_lat - lat) / (max_lat - min_lat)) * map_height + HEADER_HEIGHT,
+            )
+            for lat, lon in coordinates
+        ]
+
+
+@dataclass(frozen=True, slots=True)
+class LambertConformalConic:
+    """
+    Lambert conformal conic (spherical), the usual projection for printed maps of
+    the US. The projected bounds are stretched over the area below the header.
+    central_meridian and origin_lat default to the middle and bottom of the bounds.
+    """
+
+    standard_parallels: Tuple[float, float] = (33.0, 45.0)
+    central_meridian: float | None = None
+    origin_lat: float | None = None
+
+    def to_pixels(
+        self,
+        coordinates: Sequence[Tuple[float, float]],
+        image_width: int,
+        image_height: int,
+        bounds: dict,
+    ) -> List[Tuple[float, float]]:
+        project = self._projector(bounds)
+
+        # The bounds box becomes curved, so fit the image to samples along its edges
+        edge = [i / BOUNDS_EDGE_SAMPLES for i in range(BOUNDS_EDGE_SAMPLES + 1)]
+        lat_span = bounds["max_lat"] - bounds["min_lat"]
+        lon_span = bounds["max_lon"] - bounds["min_lon"]
+        outline = [
+            project(bounds["min_lat"] + lat_span * t, lon)
+            for t in edge
+            for lon in (bounds["min_lon"], bounds["max_lon"])
+        ] + [
+            project(lat, bounds["min_lon"] + lon_span * t)
+            for t in edge
+            for lat in (bounds["min_lat"], bounds["max_lat"])
+        ]
+        min_x = min(x for x, _ in outline)
+        max_x = max(x for x, _ in outline)
+        min_y = min(y for _, y in outline)
+        max_y = max(y for _, y in outline)
+
+        scale_x = image_width / (max_x - min_x)
+        scale_y = (image_height - HEADER_HEIGHT) / (max_y - min_y)
+        projected = [project(lat, lon) for lat, lon in coordinates]
+        return [
+            ((x - min_x) * scale_x, (max_y - y) * scale_y + HEADER_HEIGHT)
+            for x, y in projected
+        ]
+
+    def _projector(self, bounds: dict):
+        phi1, phi2 = (math.radians(p) for p in self.standard_parallels)
+        central_meridian = self.central_meridian
+        if central_meridian is None:
+            central_meridian = (bounds["min_lon"] + bounds["max_lon"]) / 2
+        origin_lat = self.origin_lat
+        if origin_lat is None:
+            origin_lat = bounds["min_lat"]
+
+        def t(phi: float) -> float:
+            return math.tan(math.pi / 4 + phi / 2)
+
+        if math.isclose(phi1, phi2):
+            n = math.sin(phi1)
+        else:
+            n = math.log(math.cos(phi1) / math.cos(phi2)) / math.log(t(phi2) / t(phi1))
+        f = math.cos(phi1) * t(phi1) ** n / n
+        rho_0 = f / t(math.radians(origin_lat)) ** n
+        lambda_0 = math.radians(central_meridian)
+
+        def project(lat: float, lon: float) -> Tuple[float, float]:
+            rho = f / t(math.radians(lat)) ** n
+            theta = n * (math.radians(lon) - lambda_0)
+            return (rho * math.sin(theta), rho_0 - rho * math.cos(theta))
+
+        return project
+
+
+@dataclass(frozen=True, slots=True)
+class AffineFit:
+    """
+    Affine map from (lon, lat) to pixels, least-squares fitted to control points
+    ((lat, lon), (x, y)) picked on the board art. Needs at least three points that
+    are not on one line. bounds are not used.
+    """
+
+    control_points: Tuple[Tuple[Tuple[float, float], Tuple[float, float]], ...]
+
+    def to_pixels(
+        self,
+        coordinates: Sequence[Tuple[float, float]],
+        image_width: int,
+        image_height: int,
+        bounds: dict,
+    ) -> List[Tuple[float, float]]:
+        (a, b, c), (d, e, f) = self._coefficients()
+        return [(a * lon + b * lat + c, d * lon + e * lat + f) for lat, lon in coordinates]
+
+    def _coefficients(self) -> Tuple[Tuple[float, float, float], ...]:
+        if len(self.control_points) < 3:
+            raise ValueError("An affine fit needs at least three control points")
+
+        # Normal equations of [lon, lat, 1] @ coefficients = pixel, for x and y at once
+        normal = [[0.0] * 3 for _ in range(3)]
+        rhs_x = [0.0] * 3
+        rhs_y = [0.0] * 3
+        for (lat, lon), (x, y) in self.control_points:
+            row = (lon, lat, 1.0)
+            for i in range(3):
+                rhs_x[i] += row[i] * x
+                rhs_y[i] += row[i] * y
+                for j in range(3):
+                    normal[i][j] += row[i] * row[j]
+        return (_solve_3x3(normal, rhs_x), _solve_3x3(normal, rhs_y))
+
+
+Projection = Equirectangular | LambertConformalConic | AffineFit
+
+
+def _solve_3x3(matrix: List[List[float]], rhs: List[float]) -> Tuple[float, float, float]:
+    """Gaussian elimination with partial pivoting."""
+    rows = [matrix[i][:] + [rhs[i]] for i in range(3)]
+    for col in range(3):
+        pivot = max(range(col, 3), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            raise ValueError("Control points are collinear; cannot fit an affine map")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(3):
+            if r != col:
+                factor = rows[r][col] / rows[col][col]
+                rows[r] = [v - factor * p for v, p in zip(rows[r], rows[col])]
+    return tuple(rows[i][3] / rows[i][i] for i in range(3))
+
+
+# Positions already computed in this process, by the same key as the files on disk
+_positions_cache: Dict[str, PixelPositions] = {}
+
+
+def city_pixel_positions(
+    city_map: Graph,
+    image_size: Tuple[int, int],
+    bounds: dict,
+    projection: Projection,
+    map_digest: str = "",
+    cache_dir: Path | None = CACHE_DIR,
+) -> PixelPositions:
+    """
+    Pixel position of every city (by city index; None without coordinates), computed
+    in one batch per map image, bounds and projection. Results are kept for the rest
+    of the process and, unless cache_dir is None, on disk for later runs.
+    """
+    image_width, image_height = image_size
+    key_data = {
+        "map": map_digest,
+        "size": [image_width, image_height],
+        "bounds": bounds,
+        "projection": repr(projection),
+        "coordinates": list(city_map.coordinates),
+    }
+    key = hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+    if key in _positions_cache:
+        return _positions_cache[key]
+
+    cache_path = None if cache_dir is None else cache_dir / f"pixels-{key[:16]}.json"
+    positions = _read_positions(cache_path, key, len(city_map))
+    if positions is None:
+        located = [i for i, c in enumerate(city_map.coordinates) if c is not None]
+        projected = projection.to_pixels(
+            [(city_map.coordinates[i]["lat"], city_map.coordinates[i]["lon"]) for i in located],
+            image_width,
+            image_height,
+            bounds,
+        )
+        positions = [None] * len(city_map)
+        for i, position in zip(located, projected):
+            positions[i] = position
+        _write_positions(cache_path, key, positions)
+
+    _positions_cache[key] = positions
+    return positions
+
+
+def _read_positions(
+    cache_path: Path | None, key: str, city_count: int
+) -> PixelPositions | None:
+    if cache_path is None:
+        return None
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return None
+    positions = cached.get("positions")
+    if not isinstance(positions, list) or len(positions) != city_count:
+        return None
+    return [None if p is None else (p[0], p[1]) for p in positions]
+
+
+def _write_positions(cache_path: Path | None, key: str, positions: PixelPositions) -> None:
+    if cache_path is None:
+        return
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, "w") as f:
+        json.dump({"key": key, "positions": positions}, f)
@@ -0,0 +1,290 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Sequence
+
+from PIL import Image, ImageDraw, ImageFont
+
+from src.data_types.graph import Graph
+from src.data_types.route import Route
+
+# Constants
+FONT_PATH = (
+    Path(__file__).parent.parent / "starting_data" / "fonts" / "CHIPPEWA_FALLS.TTF"
+)
+
+# Colors (hex to RGB)
+WHITE = (255, 255, 255)
+RED = (102, 0, 0)  # #660000
+DARK_GREEN = (13, 55, 13)  # #0d370d
+BLACK = (0, 0, 0)
+
+# Dimensions
+HEADER_HEIGHT = 130
+DOT_SIZE = 20
+LINE_WIDTH = 10
+
+# Font sizes
+FONT_SIZE = 64
+SCORE_FONT_SIZE = 106
+
+# Rendering
+ANTIALIASING_SCALE = 3
+
+# Header text
+HEADER_TEXT_PADDING = 40  # pixels on each side
+HEADER_TEXT_Y_OFFSET = 10  # pixels up from vertical center
+
+# Score circle
+CIRCLE_RADIUS_MULTIPLIER = 0.84  # relative to SCORE_FONT_SIZE
+CIRCLE_EDGE_PADDING = 20  # pixels from edge
+CIRCLE_FILL_ALPHA = 150
+CIRCLE_BORDER_WIDTH_DIVISOR = 1.5  # LINE_WIDTH / this value
+SCORE_TEXT_VERTICAL_OFFSET = 0.12  # relative to text height
+
+# Geographic positioning for score circle
+LON_LEFT_THIRD_PERCENT = 0.333
+LON_LEFT_QUARTER_PERCENT = 0.25
+LON_RIGHT_QUARTER_PERCENT = 0.25
+
+# Route value colors for border (low to high)
+ROUTE_VALUE_BORDER_COLORS = {
+    (0, 4): (102, 0, 0),  # Red (matching dots)
+    (5, 9): (0, 128, 128),  # Teal
+    (10, 14): (0, 128, 0),  # Green
+    (15, 19): (128, 0, 128),  # Purple
+    (20, float("inf")): (255, 200, 0),  # Orange
+}
+
+# Border styling
+BORDER_WIDTH = LINE_WIDTH * 2  # Twice the line width
+BORDER_DASH_WIDTH = 10  # Dash segment width in pixels
+
+
+def lat_lon_to_pixel(
+    lat: float,
+    lon: float,
+    image_width: int,
+    image_height: int,
+    bounds: dict,
+) -> tuple[float, float]:
+    """Convert latitude/longitude to pixel coordinates on the image."""
+    pixel_x = (
+        (lon - bounds["min_lon"]) / (bounds["max_lon"] - bounds["min_lon"])
+    ) * image_width
+    pixel_y = ((bounds["max_lat"] - lat) / (bounds["max_lat"] - bounds["min_lat"])) * (
+        image_height - HEADER_HEIGHT
+    ) + HEADER_HEIGHT
+    return (pixel_x, pixel_y)
+
+
+def calculate_circle_x_position(
+    coord_a: dict,
+    coord_b: dict,
+    bounds: dict,
+    image_width: int,
+    circle_radius: int,
+) -> int:
+    """Calculate horizontal position of score circle based on city locations."""
+    lon_range = bounds["max_lon"] - bounds["min_lon"]
+    lon_midpoint = (bounds["min_lon"] + bounds["max_lon"]) / 2
+    left_third = bounds["min_lon"] + lon_range * LON_LEFT_THIRD_PERCENT
+    left_quarter = bounds["min_lon"] + lon_range * LON_LEFT_QUARTER_PERCENT
+    right_quarter = bounds["max_lon"] - lon_range * LON_RIGHT_QUARTER_PERCENT
+
+    # Check if one location is in left 1/4 and the other is in right 1/4
+    one_left_one_right = (
+        coord_a["lon"] < left_quarter and coord_b["lon"] > right_quarter
+    ) or (coord_b["lon"] < left_quarter and coord_a["lon"] > right_quarter)
+
+    # Check if one location is in left half and the other is not in right 1/4
+    one_left_one_not_right_quarter = (
+        coord_a["lon"] < lon_midpoint and coord_b["lon"] <= right_quarter
+    ) or (coord_b["lon"] < lon_midpoint and coord_a["lon"] <= right_quarter)
+
+    if one_left_one_right:
+        # One on left 1/4, one on right 1/4: center the score
+        return image_width // 2
+    elif one_left_one_not_right_quarter:
+        # One in left half, other not in right 1/4: place score on right
+        return image_width - circle_radius - CIRCLE_EDGE_PADDING
+    elif coord_a["lon"] < left_third and coord_b["lon"] < left_third:
+        # Both cities are in left 1/3, place score on right
+        return image_width - circle_radius - CIRCLE_EDGE_PADDING
+    else:
+        # Default: place score on left
+        return circle_radius + CIRCLE_EDGE_PADDING
+
+
+@lru_cache(maxsize=None)
+def load_font(font_path: str, size: int) -> ImageFont.FreeTypeFont:
+    """Load font with fallback to default if custom font unavailable. Cached per size."""
+    try:
+        return ImageFont.truetype(font_path, size=size)
+    except (OSError, FileNotFoundError):
+        return ImageFont.load_default(size=int(size * 0.6))
+
+
+# Scratch canvas for text measurement, so metrics can be cached independently of a card
+_MEASURE_DRAW = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+
+@lru_cache(maxsize=4096)
+def text_bbox(text: str, size: int) -> tuple[int, int, int, int]:
+    """Bounding box of text in the card font at the given size."""
+    font = load_font(str(FONT_PATH), size)
+    return _MEASURE_DRAW.textbbox((0, 0), text, font=font)
+
+
+def get_border_color_for_route_value(route_value: int) -> tuple[int, int, int]:
+    """Get border color based on route value range."""
+    for (min_val, max_val), color in ROUTE_VALUE_BORDER_COLORS.items():
+        if min_val <= route_value <= max_val:
+            return color
+    return RED  # Fallback to red
+
+
+def curve_control_point(
+    x1: float,
+    y1: float,
+    x2: float,
+    y2: float,
+    curve_amount: float = 0.1,
+) -> tuple[float, float]:
+    """Control point of the quadratic Bezier curve drawn between two points."""
+    # Calculate midpoint
+    mid_x = (x1 + x2) / 2
+    mid_y = (y1 + y2) / 2
+
+    # Vector from point 1 to point 2
+    dx = x2 - x1
+    dy = y2 - y1
+
+    # Perpendicular vector (rotated 90 degrees)
+    perp_x = -dy
+    perp_y = dx
+
+    # Normalize and scale perpendicular vector for curve control point
+    length = (perp_x**2 + perp_y**2) ** 0.5
+    if length > 0:
+        perp_x = (perp_x / length) * length * curve_amount
+        perp_y = (perp_y / length) * length * curve_amount
+
+    # Control point for the curve (offset from midpoint)
+    return (mid_x + perp_x, mid_y + perp_y)
+
+
+def fit_header_font_size(header_text: str, image_width: int) -> int:
+    """Header font size, scaled down if the text would not fit within the padding."""
+    bbox = text_bbox(header_text, FONT_SIZE)
+    text_width = bbox[2] - bbox[0]
+
+    # Scale down font if text exceeds image width (with padding)
+    max_text_width = image_width - HEADER_TEXT_PADDING
+    if text_width > max_text_width:
+        scale_factor = max_text_width / text_width
+        return int(FONT_SIZE * scale_factor)
+    return FONT_SIZE
+
+
+@dataclass(frozen=True, slots=True)
+class RouteLayout:
+    """Where every element of a route card goes, shared by all output formats."""
+
+    header_text: str
+    header_font_size: int
+    header_position: tuple[int, int]
+    start: tuple[float, float]
+    end: tuple[float, float]
+    control: tuple[float, float]
+    score_text: str
+    circle_center: tuple[int, int]
+    circle_radius: int
+    score_position: tuple[int, int]
+    border_color: tuple[int, int, int]
+    border_width: int
+
+
+def route_layout(
+    route: Route,
+    city_map: Graph,
+    bounds: dict,
+    image_width: int,
+    image_height: int,
+    positions: Sequence[tuple[float, float] | None] | None = None,
+) -> RouteLayout:
+    """
+    Place the header, route curve, score circle and border for one card.
+    positions are precomputed city pixel positions by city index (see
+    projection.city_pixel_positions); without them the map is equirectangular.
+    """
+    # Header text, top-left anchored like ImageDraw.text
+    header_text = f"{route.a.value} <> {route.b.value}"
+    header_font_size = fit_header_font_size(header_text, image_width)
+    bbox = text_bbox(header_text, header_font_size)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    header_position = (
+        (image_width - text_width) // 2,
+        (HEADER_HEIGHT - text_height) // 2 - HEADER_TEXT_Y_OFFSET,
+    )
+
+    # Get coordinates from the map graph
+    coord_a = city_map.coordinates_of(route.a)
+    coord_b = city_map.coordinates_of(route.b)
+
+    if coord_a is None or coord_b is None:
+        raise ValueError(
+            f"Route cities must have coordinates. "
+            f"{route.a.value}: {coord_a}, {route.b.value}: {coord_b}"
+        )
+
+    # Convert lat/lon to pixel coordinates
+    if positions is not None:
+        x1, y1 = positions[city_map.index[route.a]]
+        x2, y2 = positions[city_map.index[route.b]]
+    else:
+        x1, y1 = lat_lon_to_pixel(
+            coord_a["lat"], coord_a["lon"], image_width, image_height, bounds
+        )
+        x2, y2 = lat_lon_to_pixel(
+            coord_b["lat"], coord_b["lon"], image_width, image_height, bounds
+        )
+
+    # Circle parameters - fixed size consistent for all scores
+    circle_radius = int(SCORE_FONT_SIZE * CIRCLE_RADIUS_MULTIPLIER)
+
+    # Determine score position based on longitude
+    circle_x = calculate_circle_x_position(
+        coord_a, coord_b, bounds, image_width, circle_radius
+    )
+    circle_y = image_height - circle_radius - CIRCLE_EDGE_PADDING
+
+    # Score text centered in the circle
+    score_text = str(route.value)
+    bbox = text_bbox(score_text, SCORE_FONT_SIZE)
+    score_text_width = bbox[2] - bbox[0]
+    score_text_height = bbox[3] - bbox[1]
+    score_position = (
+        circle_x - score_text_width // 2,
+        circle_y
+        - score_text_height // 2
+        - score_text_height // 2
+        + int(score_text_height * SCORE_TEXT_VERTICAL_OFFSET),
+    )
+
+    return RouteLayout(
+        header_text=header_text,
+        header_font_size=header_font_size,
+        header_position=header_position,
+        start=(x1, y1),
+        end=(x2, y2),
+        control=curve_control_point(x1, y1, x2, y2),
+        score_text=score_text,
+        circle_center=(circle_x, circle_y),
+        circle_radius=circle_radius,
+        score_position=score_position,
+        # Colored dashed border based on route value
+        border_color=get_border_color_for_route_value(route.value),
+        border_width=int(BORDER_WIDTH / 1.5),
+    )
@@ -0,0 +1,129 @@
+import json
+import os
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict
+
+# Formats that are already compressed gain nothing from deflate
+STORED_SUFFIXES = {".jpeg", ".jpg", ".png"}
+
+MANIFEST_NAME = "manifest.json"
+
+
+class RouteImageSink:
+    """
+    Destination for encoded route images, written one at a time as they finish.
+
+    output may be a ".zip" path, a directory path, or a writable binary file object
+    (including a pipe), which receives a zip stream.
+
+    Path outputs keep a manifest of {image name: fingerprint} next to the images, so
+    a later run can reuse() unchanged images from the previous output instead of
+    rendering them again. A zip is rebuilt in a temporary file and swapped in on a
+    clean close, leaving the previous archive intact if rendering fails.
+    """
+
+    def __init__(self, output: str | Path | BinaryIO):
+        self._zip_file: zipfile.ZipFile | None = None
+        self._previous_zip: zipfile.ZipFile | None = None
+        self._directory: Path | None = None
+        self._zip_path: Path | None = None
+        self._tmp_path: Path | None = None
+        self.manifest_path: Path | None = None
+        self.previous_manifest: Dict[str, str] = {}
+        self.manifest: Dict[str, str] = {}
+
+        if hasattr(output, "write"):
+            name = getattr(output, "name", "")
+            self.location = name if isinstance(name, str) else ""
+            self._zip_file = zipfile.ZipFile(output, "w")
+            return
+
+        if Path(output).suffix.lower() == ".zip":
+            self._zip_path = Path(output)
+            self._zip_path.parent.mkdir(parents=True, exist_ok=True)
+            self.location = str(self._zip_path)
+            self.manifest_path = self._zip_path.with_suffix(".manifest.json")
+            self._open_previous_zip()
+            self._tmp_path = self._zip_path.with_suffix(".zip.tmp")
+            self._zip_file = zipfile.ZipFile(self._tmp_path, "w")
+        else:
+            self._directory = Path(output)
+            self._directory.mkdir(parents=True, exist_ok=True)
+            self.location = str(self._directory)
+            self.manifest_path = self._directory / MANIFEST_NAME
+
+        self.previous_manifest = self._load_manifest()
+
+    def _open_previous_zip(self) -> None:
+        try:
+            self._previous_zip = zipfile.ZipFile(self._zip_path)
+        except (OSError, zipfile.BadZipFile):
+            self._previous_zip = None
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    def can_reuse(self, name: str, fingerprint: str) -> bool:
+        """True when the previous output holds name rendered from the same fingerprint."""
+        if self.previous_manifest.get(name) != fingerprint:
+            return False
+        if self._previous_zip is not None:
+            return name in self._previous_zip.NameToInfo
+        if self._directory is not None:
+            return (self._directory / name).is_file()
+        return False
+
+    def reuse(self, name: str, fingerprint: str) -> None:
+        if self._previous_zip is not None:
+            info = self._previous_zip.getinfo(name)
+            self._zip_file.writestr(
+                name, self._previous_zip.read(info), compress_type=info.compress_type
+            )
+        self.manifest[name] = fingerprint
+
+    def write(self, name: str, data: bytes, fingerprint: str | None = None) -> None:
+        if self._zip_file is not None:
+            compress_type = (
+                zipfile.ZIP_STORED
+                if Path(name).suffix.lower() in STORED_SUFFIXES
+                else zipfile.ZIP_DEFLATED
+            )
+            self._zip_file.writestr(name, data, compress_type=compress_type)
+        else:
+            (self._directory / name).write_bytes(data)
+        if fingerprint is not None:
+            self.manifest[name] = fingerprint
+
+    def close(self, success: bool = True) -> None:
+        if self._zip_file is not None:
+            self._zip_file.close()
+        if self._previous_zip is not None:
+            self._previous_zip.close()
+
+        if self._tmp_path is not None:
+            if not success:
+                self._tmp_path.unlink(missing_ok=True)
+                return
+            os.replace(self._tmp_path, self._zip_path)
+
+        if success and self._directory is not None:
+            # Drop cards from the previous run that are no longer part of the deck
+            for name in self.previous_manifest.keys() - self.manifest.keys():
+                (self._directory / name).unlink(missing_ok=True)
+
+        # A directory is updated in place, so record what it holds even after a failure
+        if self.manifest_path is not None:
+            with open(self.manifest_path, "w") as f:
+                json.dump(self.manifest, f, indent=2, sort_keys=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(success=exc_type is None)
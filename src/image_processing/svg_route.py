@@ -0,0 +1,114 @@
+from xml.sax.saxutils import escape, quoteattr
+
+from src.image_processing.route_layout import (
+    BLACK,
+    BORDER_DASH_WIDTH,
+    CIRCLE_BORDER_WIDTH_DIVISOR,
+    CIRCLE_FILL_ALPHA,
+    DARK_GREEN,
+    DOT_SIZE,
+    FONT_PATH,
+    HEADER_HEIGHT,
+    LINE_WIDTH,
+    RED,
+    SCORE_FONT_SIZE,
+    RouteLayout,
+    load_font,
+)
+
+# Header band opacity, matching the raster header box (alpha 102 of 255)
+HEADER_FILL_OPACITY = 102 / 255
+FONT_FAMILY = "'Chippewa Falls', sans-serif"
+
+
+def _rgb(color: tuple[int, int, int]) -> str:
+    return "#{:02x}{:02x}{:02x}".format(*color)
+
+
+def _number(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def _text_baseline(top: int, font_size: int) -> float:
+    """Convert a top-anchored text position (as ImageDraw uses) to an SVG baseline."""
+    ascent, _ = load_font(str(FONT_PATH), font_size).getmetrics()
+    return top + ascent
+
+
+def _dashed_border_lines(
+    image_width: int,
+    image_height: int,
+    color: tuple[int, int, int],
+    width: int,
+) -> list[str]:
+    """Dashed border as four stroked lines, with the same dash pattern as the raster."""
+    dash_length = BORDER_DASH_WIDTH * 8
+    gap_length = BORDER_DASH_WIDTH // 2
+    half = width // 2
+    sides = [
+        (0, half, image_width, half),
+        (0, image_height - half, image_width, image_height - half),
+        (half, 0, half, image_height),
+        (image_width - half, 0, image_width - half, image_height),
+    ]
+    return [
+        f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{_rgb(color)}" '
+        f'stroke-width="{width}" stroke-dasharray="{dash_length} {gap_length}"/>'
+        for x1, y1, x2, y2 in sides
+    ]
+
+
+def route_svg(
+    layout: RouteLayout,
+    map_href: str,
+    image_width: int,
+    image_height: int,
+) -> str:
+    """
+    Build the vector version of a route card. The base map is referenced by map_href
+    rather than embedded, so a whole deck can share one copy of it.
+    """
+    (x1, y1), (x2, y2) = layout.start, layout.end
+    ctrl_x, ctrl_y = layout.control
+    circle_x, circle_y = layout.circle_center
+    circle_border_width = int(LINE_WIDTH / CIRCLE_BORDER_WIDTH_DIVISOR)
+
+    elements = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" '
+        f'xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{image_width}" height="{image_height}" '
+        f'viewBox="0 0 {image_width} {image_height}">',
+        f"<image href={quoteattr(map_href)} xlink:href={quoteattr(map_href)} "
+        f'x="0" y="0" width="{image_width}" height="{image_height}"/>',
+        # Header box and text
+        f'<rect x="0" y="0" width="{image_width}" height="{HEADER_HEIGHT}" '
+        f'fill="#ffffff" fill-opacity="{_number(HEADER_FILL_OPACITY)}"/>',
+        f'<text x="{image_width / 2:g}" '
+        f'y="{_number(_text_baseline(layout.header_position[1], layout.header_font_size))}" '
+        f'text-anchor="middle" font-family="{FONT_FAMILY}" '
+        f'font-size="{layout.header_font_size}" fill="{_rgb(BLACK)}">'
+        f"{escape(layout.header_text)}</text>",
+        # Route curve (quadratic Bezier) and city dots
+        f'<path d="M {_number(x1)} {_number(y1)} Q {_number(ctrl_x)} {_number(ctrl_y)} '
+        f'{_number(x2)} {_number(y2)}" fill="none" stroke="{_rgb(DARK_GREEN)}" '
+        f'stroke-width="{LINE_WIDTH}"/>',
+        f'<circle cx="{_number(x1)}" cy="{_number(y1)}" r="{_number(DOT_SIZE / 2)}" '
+        f'fill="{_rgb(RED)}"/>',
+        f'<circle cx="{_number(x2)}" cy="{_number(y2)}" r="{_number(DOT_SIZE / 2)}" '
+        f'fill="{_rgb(RED)}"/>',
+        # Score circle (stroke kept inside the radius, as ImageDraw.ellipse does)
+        f'<circle cx="{circle_x}" cy="{circle_y}" '
+        f'r="{_number(layout.circle_radius - circle_border_width / 2)}" fill="#ffffff" '
+        f'fill-opacity="{_number(CIRCLE_FILL_ALPHA / 255)}" stroke="{_rgb(DARK_GREEN)}" '
+        f'stroke-width="{circle_border_width}"/>',
+        f'<text x="{circle_x}" '
+        f'y="{_number(_text_baseline(layout.score_position[1], SCORE_FONT_SIZE))}" '
+        f'text-anchor="middle" font-family="{FONT_FAMILY}" '
+        f'font-size="{SCORE_FONT_SIZE}" fill="{_rgb(BLACK)}">'
+        f"{escape(layout.score_text)}</text>",
+    ]
+    elements += _dashed_border_lines(
+        image_width, image_height, layout.border_color, layout.border_width
+    )
+    elements.append("</svg>")
+    return "\n".join(elements) + "\n"
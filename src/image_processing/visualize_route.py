@@ -1,133 +1,83 @@
-import zipfile
+import hashlib
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from multiprocessing import shared_memory
+from multiprocessing.util import Finalize
 from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
 
-from PIL import Image, ImageDraw, ImageFont
+import PIL
+from PIL import Image, ImageDraw
 
+from src.data_types.graph import Graph
 from src.data_types.route import Route
-
-# Constants
-FONT_PATH = (
-    Path(__file__).parent.parent / "starting_data" / "fonts" / "CHIPPEWA_FALLS.TTF"
+from src.image_processing.route_layout import (
+    ANTIALIASING_SCALE,
+    BLACK,
+    BORDER_DASH_WIDTH,
+    BORDER_WIDTH,
+    CIRCLE_BORDER_WIDTH_DIVISOR,
+    CIRCLE_EDGE_PADDING,
+    CIRCLE_FILL_ALPHA,
+    CIRCLE_RADIUS_MULTIPLIER,
+    DARK_GREEN,
+    DOT_SIZE,
+    FONT_PATH,
+    FONT_SIZE,
+    HEADER_HEIGHT,
+    HEADER_TEXT_PADDING,
+    HEADER_TEXT_Y_OFFSET,
+    LINE_WIDTH,
+    LON_LEFT_QUARTER_PERCENT,
+    LON_LEFT_THIRD_PERCENT,
+    LON_RIGHT_QUARTER_PERCENT,
+    RED,
+    ROUTE_VALUE_BORDER_COLORS,
+    SCORE_FONT_SIZE,
+    SCORE_TEXT_VERTICAL_OFFSET,
+    WHITE,
+    RouteLayout,
+    curve_control_point,
+    load_font,
+    route_layout,
+)
+from src.image_processing.projection import (
+    Equirectangular,
+    PixelPositions,
+    Projection,
+    city_pixel_positions,
 )
+from src.image_processing.route_output import RouteImageSink
+from src.image_processing.svg_route import route_svg
+
 OUTPUT_DIR = Path(__file__).parent.parent / "output_data" / "visualized_routes"
 
-# Colors (hex to RGB)
-WHITE = (255, 255, 255)
-RED = (102, 0, 0)  # #660000
-DARK_GREEN = (13, 55, 13)  # #0d370d
-BLACK = (0, 0, 0)
-
-# Dimensions
-HEADER_HEIGHT = 130
-DOT_SIZE = 20
-LINE_WIDTH = 10
-
-# Font sizes
-FONT_SIZE = 64
-SCORE_FONT_SIZE = 106
-
-# Rendering
-ANTIALIASING_SCALE = 3
-
-# Header text
-HEADER_TEXT_PADDING = 40  # pixels on each side
-HEADER_TEXT_Y_OFFSET = 10  # pixels up from vertical center
-
-# Score circle
-CIRCLE_RADIUS_MULTIPLIER = 0.84  # relative to SCORE_FONT_SIZE
-CIRCLE_EDGE_PADDING = 20  # pixels from edge
-CIRCLE_FILL_ALPHA = 150
-CIRCLE_BORDER_WIDTH_DIVISOR = 1.5  # LINE_WIDTH / this value
-SCORE_TEXT_VERTICAL_OFFSET = 0.12  # relative to text height
-
-# Geographic positioning for score circle
-LON_LEFT_THIRD_PERCENT = 0.333
-LON_LEFT_QUARTER_PERCENT = 0.25
-LON_RIGHT_QUARTER_PERCENT = 0.25
-
-# Route value colors for border (low to high)
-ROUTE_VALUE_BORDER_COLORS = {
-    (0, 4): (102, 0, 0),  # Red (matching dots)
-    (5, 9): (0, 128, 128),  # Teal
-    (10, 14): (0, 128, 0),  # Green
-    (15, 19): (128, 0, 128),  # Purple
-    (20, float("inf")): (255, 200, 0),  # Orange
-}
-
-# Border styling
-BORDER_WIDTH = LINE_WIDTH * 2  # Twice the line width
-BORDER_DASH_WIDTH = 10  # Dash segment width in pixels
-
-
-def lat_lon_to_pixel(
-    lat: float,
-    lon: float,
-    image_width: int,
-    image_height: int,
-    bounds: dict,
-) -> tuple[float, float]:
-    """Convert latitude/longitude to pixel coordinates on the image."""
-    pixel_x = (
-        (lon - bounds["min_lon"]) / (bounds["max_lon"] - bounds["min_lon"])
-    ) * image_width
-    pixel_y = ((bounds["max_lat"] - lat) / (bounds["max_lat"] - bounds["min_lat"])) * (
-        image_height - HEADER_HEIGHT
-    ) + HEADER_HEIGHT
-    return (pixel_x, pixel_y)
-
-
-def _calculate_circle_x_position(
-    coord_a: dict,
-    coord_b: dict,
-    bounds: dict,
-    image_width: int,
-    circle_radius: int,
-) -> int:
-    """Calculate horizontal position of score circle based on city locations."""
-    lon_range = bounds["max_lon"] - bounds["min_lon"]
-    lon_midpoint = (bounds["min_lon"] + bounds["max_lon"]) / 2
-    left_third = bounds["min_lon"] + lon_range * LON_LEFT_THIRD_PERCENT
-    left_quarter = bounds["min_lon"] + lon_range * LON_LEFT_QUARTER_PERCENT
-    right_quarter = bounds["max_lon"] - lon_range * LON_RIGHT_QUARTER_PERCENT
-
-    # Check if one location is in left 1/4 and the other is in right 1/4
-    one_left_one_right = (
-        coord_a["lon"] < left_quarter and coord_b["lon"] > right_quarter
-    ) or (coord_b["lon"] < left_quarter and coord_a["lon"] > right_quarter)
-
-    # Check if one location is in left half and the other is not in right 1/4
-    one_left_one_not_right_quarter = (
-        coord_a["lon"] < lon_midpoint and coord_b["lon"] <= right_quarter
-    ) or (coord_b["lon"] < lon_midpoint and coord_a["lon"] <= right_quarter)
-
-    if one_left_one_right:
-        # One on left 1/4, one on right 1/4: center the score
-        return image_width // 2
-    elif one_left_one_not_right_quarter:
-        # One in left half, other not in right 1/4: place score on right
-        return image_width - circle_radius - CIRCLE_EDGE_PADDING
-    elif coord_a["lon"] < left_third and coord_b["lon"] < left_third:
-        # Both cities are in left 1/3, place score on right
-        return image_width - circle_radius - CIRCLE_EDGE_PADDING
-    else:
-        # Default: place score on left
-        return circle_radius + CIRCLE_EDGE_PADDING
+# Output formats and the file suffix each card gets
+IMAGE_FORMATS = {"jpeg": ".jpeg", "svg": ".svg"}
 
+# Vector cards all reference one copy of the base map stored under this name
+SVG_BASE_MAP_NAME = "base_map"
 
-def _load_font(font_path: str, size: int) -> ImageFont.FreeTypeFont:
-    """Load font with fallback to default if custom font unavailable."""
-    try:
-        return ImageFont.truetype(font_path, size=size)
-    except (OSError, FileNotFoundError):
-        return ImageFont.load_default(size=int(size * 0.6))
+# Cards each render process may have queued or finished but not yet written
+PARALLEL_CARDS_PER_WORKER = 4
 
 
-def _get_border_color_for_route_value(route_value: int) -> tuple[int, int, int]:
-    """Get border color based on route value range."""
-    for (min_val, max_val), color in ROUTE_VALUE_BORDER_COLORS.items():
-        if min_val <= route_value <= max_val:
-            return color
-    return RED  # Fallback to red
+@lru_cache(maxsize=None)
+def _border_layer(
+    image_width: int,
+    image_height: int,
+    color: tuple[int, int, int],
+    width: int,
+) -> Image.Image:
+    """Transparent layer holding the dashed border, built once per border color."""
+    layer = Image.new("RGBA", (image_width, image_height), (0, 0, 0, 0))
+    _draw_dashed_border(ImageDraw.Draw(layer), image_width, image_height, color, width)
+    return layer
 
 
 def _draw_dashed_border(
@@ -201,27 +151,7 @@ def _draw_curved_line(
         width: Line width
         curve_amount: Curve intensity (0.1 = 10% of line distance)
     """
-    # Calculate midpoint
-    mid_x = (x1 + x2) / 2
-    mid_y = (y1 + y2) / 2
-
-    # Vector from point 1 to point 2
-    dx = x2 - x1
-    dy = y2 - y1
-
-    # Perpendicular vector (rotated 90 degrees)
-    perp_x = -dy
-    perp_y = dx
-
-    # Normalize and scale perpendicular vector for curve control point
-    length = (perp_x**2 + perp_y**2) ** 0.5
-    if length > 0:
-        perp_x = (perp_x / length) * length * curve_amount
-        perp_y = (perp_y / length) * length * curve_amount
-
-    # Control point for the curve (offset from midpoint)
-    ctrl_x = mid_x + perp_x
-    ctrl_y = mid_y + perp_y
+    ctrl_x, ctrl_y = curve_control_point(x1, y1, x2, y2, curve_amount)
 
     # Draw curved line as a series of line segments
     num_segments = 20
@@ -236,32 +166,37 @@ def _draw_curved_line(
     draw.line(points, fill=color, width=width)
 
 
-def _draw_header_text(
-    draw: ImageDraw.ImageDraw,
-    header_text: str,
-    image_width: int,
-) -> tuple[int, int]:
-    """Draw header text with automatic font scaling if needed."""
-    font = _load_font(str(FONT_PATH), FONT_SIZE)
-    bbox = draw.textbbox((0, 0), header_text, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
-
-    # Scale down font if text exceeds image width (with padding)
-    max_text_width = image_width - HEADER_TEXT_PADDING
-    if text_width > max_text_width:
-        scale_factor = max_text_width / text_width
-        new_font_size = int(FONT_SIZE * scale_factor)
-        font = _load_font(str(FONT_PATH), new_font_size)
-        # Recalculate dimensions with new font
-        bbox = draw.textbbox((0, 0), header_text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-
-    text_x = (image_width - text_width) // 2
-    text_y = (HEADER_HEIGHT - text_height) // 2 - HEADER_TEXT_Y_OFFSET
-
-    draw.text((text_x, text_y), header_text, fill=BLACK, font=font)
+def _prepare_base_image(base_img: Image.Image) -> Image.Image:
+    """Decode the map once and apply the parts every card shares (the header band)."""
+    img = base_img.convert("RGB")
+
+    # Draw white header box with transparency
+    header_img = Image.new("RGBA", (img.width, HEADER_HEIGHT), (255, 255, 255, 102))
+    img.paste(header_img, (0, 0), header_img)
+    return img
+
+
+def _draw_header_text(draw: ImageDraw.ImageDraw, layout: RouteLayout) -> None:
+    """Draw header text at the size and position chosen by the layout."""
+    font = load_font(str(FONT_PATH), layout.header_font_size)
+    draw.text(layout.header_position, layout.header_text, fill=BLACK, font=font)
+
+
+@lru_cache(maxsize=None)
+def _score_circle_sprite(circle_radius: int) -> Image.Image:
+    """Transparent circle sprite shared by every score position."""
+    sprite = Image.new(
+        "RGBA",
+        (2 * circle_radius + 1, 2 * circle_radius + 1),
+        (0, 0, 0, 0),
+    )
+    ImageDraw.Draw(sprite).ellipse(
+        [(0, 0), (2 * circle_radius, 2 * circle_radius)],
+        fill=(255, 255, 255, CIRCLE_FILL_ALPHA),
+        outline=DARK_GREEN,
+        width=int(LINE_WIDTH / CIRCLE_BORDER_WIDTH_DIVISOR),
+    )
+    return sprite
 
 
 def _draw_score_circle(
@@ -269,183 +204,332 @@ def _draw_score_circle(
     circle_x: int,
     circle_y: int,
     circle_radius: int,
-    score_text: str,
-    image_width: int,
-    image_height: int,
 ) -> None:
-    """Draw the score circle with text in the bottom corner."""
-    # Draw white circle with transparency
-    circle_img = Image.new(
+    """Draw the score circle in the bottom corner."""
+    sprite = _score_circle_sprite(circle_radius)
+    img.paste(sprite, (circle_x - circle_radius, circle_y - circle_radius), sprite)
+
+
+def _draw_route_overlay(
+    img: Image.Image,
+    x1: float,
+    y1: float,
+    x2: float,
+    y2: float,
+) -> None:
+    """
+    Draw the route curve and city dots at ANTIALIASING_SCALE on a transparent overlay
+    covering only their bounding box, scale it down and composite it onto img.
+    """
+    # The curve stays inside the triangle formed by its endpoints and control point
+    ctrl_x, ctrl_y = curve_control_point(x1, y1, x2, y2)
+    dot_radius = DOT_SIZE / 2.0
+    # Leave room for the stroke, the dots and the LANCZOS filter support
+    padding = max(LINE_WIDTH, DOT_SIZE) / 2.0 + 4
+    left = max(0, int(min(x1, x2, ctrl_x) - padding))
+    top = max(0, int(min(y1, y2, ctrl_y) - padding))
+    right = min(img.width, int(max(x1, x2, ctrl_x) + padding) + 1)
+    bottom = min(img.height, int(max(y1, y2, ctrl_y) + padding) + 1)
+    if right <= left or bottom <= top:
+        return
+
+    overlay = Image.new(
         "RGBA",
-        (image_width, image_height),
+        ((right - left) * ANTIALIASING_SCALE, (bottom - top) * ANTIALIASING_SCALE),
         (0, 0, 0, 0),
     )
-    circle_draw = ImageDraw.Draw(circle_img)
-    circle_draw.ellipse(
-        [
-            (circle_x - circle_radius, circle_y - circle_radius),
-            (circle_x + circle_radius, circle_y + circle_radius),
-        ],
-        fill=(255, 255, 255, CIRCLE_FILL_ALPHA),
-        outline=DARK_GREEN,
-        width=int(LINE_WIDTH / CIRCLE_BORDER_WIDTH_DIVISOR),
+    overlay_draw = ImageDraw.Draw(overlay)
+
+    def scaled(x: float, y: float) -> tuple[float, float]:
+        return ((x - left) * ANTIALIASING_SCALE, (y - top) * ANTIALIASING_SCALE)
+
+    _draw_curved_line(
+        overlay_draw,
+        *scaled(x1, y1),
+        *scaled(x2, y2),
+        DARK_GREEN,
+        LINE_WIDTH * ANTIALIASING_SCALE,
     )
-    img.paste(circle_img, (0, 0), circle_img)
+
+    scaled_dot_radius = dot_radius * ANTIALIASING_SCALE
+    for x, y in (scaled(x1, y1), scaled(x2, y2)):
+        overlay_draw.ellipse(
+            [
+                (x - scaled_dot_radius, y - scaled_dot_radius),
+                (x + scaled_dot_radius, y + scaled_dot_radius),
+            ],
+            fill=RED,
+        )
+
+    # RGBA is resized premultiplied, so the transparent surroundings don't bleed in
+    overlay = overlay.resize((right - left, bottom - top), Image.Resampling.LANCZOS)
+    img.paste(overlay, (left, top), overlay)
 
 
 def _visualize_single_route(
     route: Route,
-    output_image_path: str,
+    output_image_path: str | BinaryIO,
     base_img: Image.Image,
     image_width: int,
     image_height: int,
-    city_map: dict,
+    city_map: Graph,
     bounds: dict,
+    positions: PixelPositions | None = None,
 ) -> None:
-    """Helper function to visualize a single route."""
-    # Use the pre-loaded base image (convert to RGB for each route to avoid modifying shared state)
+    """
+    Helper function to visualize a single route. base_img comes from
+    _prepare_base_image, so only the route-specific layers are drawn here.
+    """
+    # Copy the shared base image (convert to RGB for each route to avoid modifying shared state)
     img = base_img.convert("RGB")
 
     draw = ImageDraw.Draw(img)
-
-    # Draw white header box with transparency
-    header_img = Image.new("RGBA", (image_width, HEADER_HEIGHT), (255, 255, 255, 102))
-    img.paste(header_img, (0, 0), header_img)
+    layout = route_layout(
+        route, city_map, bounds, image_width, image_height, positions
+    )
 
     # Draw header text
-    header_text = f"{route.a.value} <> {route.b.value}"
-    _draw_header_text(draw, header_text, image_width)
-
-    # Get coordinates from Location objects in city_map
-    location_a = city_map[route.a]
-    location_b = city_map[route.b]
-    coord_a = location_a.coordinates
-    coord_b = location_b.coordinates
-
-    if coord_a is None or coord_b is None:
-        raise ValueError(
-            f"Route cities must have coordinates. "
-            f"{route.a.value}: {coord_a}, {route.b.value}: {coord_b}"
-        )
+    _draw_header_text(draw, layout)
 
-    # Convert lat/lon to pixel coordinates
-    x1, y1 = lat_lon_to_pixel(
-        coord_a["lat"], coord_a["lon"], image_width, image_height, bounds
-    )
-    x2, y2 = lat_lon_to_pixel(
-        coord_b["lat"], coord_b["lon"], image_width, image_height, bounds
+    # Supersample only the route overlay, then composite it onto the untouched map
+    _draw_route_overlay(img, *layout.start, *layout.end)
+
+    # Draw score circle
+    _draw_score_circle(img, *layout.circle_center, layout.circle_radius)
+
+    # Draw score text on top
+    score_font = load_font(str(FONT_PATH), SCORE_FONT_SIZE)
+    draw.text(layout.score_position, layout.score_text, fill=BLACK, font=score_font)
+
+    # Draw colored dashed border based on route value
+    border = _border_layer(
+        image_width, image_height, layout.border_color, layout.border_width
     )
+    img.paste(border, (0, 0), border)
 
-    # Draw at higher resolution for antialiasing, then scale down
-    scaled_width = image_width * ANTIALIASING_SCALE
-    scaled_height = image_height * ANTIALIASING_SCALE
-    scaled_img = img.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS)
-    scaled_draw = ImageDraw.Draw(scaled_img)
+    # Save the image
+    img.save(output_image_path, "JPEG", quality=100)
 
-    # Draw curved line
-    _draw_curved_line(
-        scaled_draw,
-        x1 * ANTIALIASING_SCALE,
-        y1 * ANTIALIASING_SCALE,
-        x2 * ANTIALIASING_SCALE,
-        y2 * ANTIALIASING_SCALE,
-        DARK_GREEN,
-        LINE_WIDTH * ANTIALIASING_SCALE,
+
+def _encode_route(
+    route: Route,
+    base_img: Image.Image,
+    city_map: Graph,
+    bounds: dict,
+    positions: PixelPositions | None = None,
+) -> bytes:
+    """Render one route card straight into JPEG bytes."""
+    buffer = io.BytesIO()
+    _visualize_single_route(
+        route,
+        buffer,
+        base_img,
+        base_img.width,
+        base_img.height,
+        city_map,
+        bounds,
+        positions,
     )
+    return buffer.getvalue()
 
-    scaled_dot_radius = DOT_SIZE * ANTIALIASING_SCALE / 2.0
-    scaled_draw.ellipse(
-        [
-            (
-                x1 * ANTIALIASING_SCALE - scaled_dot_radius,
-                y1 * ANTIALIASING_SCALE - scaled_dot_radius,
-            ),
-            (
-                x1 * ANTIALIASING_SCALE + scaled_dot_radius,
-                y1 * ANTIALIASING_SCALE + scaled_dot_radius,
-            ),
+
+def _file_digest(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return ""
+    return digest.hexdigest()
+
+
+def _render_style_digest(image_format: str) -> str:
+    """Hash every setting that changes how a card looks, independent of its route."""
+    style = {
+        "format": image_format,
+        "pillow": PIL.__version__,
+        "font": _file_digest(FONT_PATH),
+        "colors": [WHITE, RED, DARK_GREEN, BLACK],
+        "dimensions": [HEADER_HEIGHT, DOT_SIZE, LINE_WIDTH, FONT_SIZE, SCORE_FONT_SIZE],
+        "antialiasing_scale": ANTIALIASING_SCALE,
+        "header_text": [HEADER_TEXT_PADDING, HEADER_TEXT_Y_OFFSET],
+        "circle": [
+            CIRCLE_RADIUS_MULTIPLIER,
+            CIRCLE_EDGE_PADDING,
+            CIRCLE_FILL_ALPHA,
+            CIRCLE_BORDER_WIDTH_DIVISOR,
+            SCORE_TEXT_VERTICAL_OFFSET,
         ],
-        fill=RED,
-    )
-    scaled_draw.ellipse(
-        [
-            (
-                x2 * ANTIALIASING_SCALE - scaled_dot_radius,
-                y2 * ANTIALIASING_SCALE - scaled_dot_radius,
-            ),
-            (
-                x2 * ANTIALIASING_SCALE + scaled_dot_radius,
-                y2 * ANTIALIASING_SCALE + scaled_dot_radius,
-            ),
+        "circle_position": [
+            LON_LEFT_THIRD_PERCENT,
+            LON_LEFT_QUARTER_PERCENT,
+            LON_RIGHT_QUARTER_PERCENT,
         ],
-        fill=RED,
-    )
+        "border_colors": [
+            [str(value_range), color]
+            for value_range, color in ROUTE_VALUE_BORDER_COLORS.items()
+        ],
+        "border": [BORDER_WIDTH, BORDER_DASH_WIDTH],
+    }
+    return hashlib.sha256(json.dumps(style, sort_keys=True).encode()).hexdigest()
 
-    # Scale back down with antialiasing
-    img = scaled_img.resize((image_width, image_height), Image.Resampling.LANCZOS)
 
-    # Draw score circle
-    draw = ImageDraw.Draw(img)
-    score_text = str(route.value)
+def _route_fingerprint(
+    route: Route,
+    city_map: Graph,
+    map_digest: str,
+    bounds: dict,
+    projection: Projection,
+    style_digest: str,
+) -> str:
+    """Fingerprint of everything one card is rendered from."""
+    fingerprint = {
+        "route": [route.a.value, route.b.value, route.value],
+        "coordinates": [
+            city_map.coordinates_of(route.a),
+            city_map.coordinates_of(route.b),
+        ],
+        "map": map_digest,
+        "bounds": bounds,
+        "projection": repr(projection),
+        "style": style_digest,
+    }
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
 
-    # Circle parameters - fixed size consistent for all scores
-    circle_radius = int(SCORE_FONT_SIZE * CIRCLE_RADIUS_MULTIPLIER)
 
-    # Determine score position based on longitude
-    circle_x = _calculate_circle_x_position(
-        coord_a, coord_b, bounds, image_width, circle_radius
-    )
-    circle_y = image_height - circle_radius - CIRCLE_EDGE_PADDING
+# Per-process state for parallel rendering, filled in once by _init_render_worker
+_worker_state: dict = {}
 
-    _draw_score_circle(
-        img, circle_x, circle_y, circle_radius, score_text, image_width, image_height
-    )
 
-    # Draw score text on top
-    score_font = _load_font(str(FONT_PATH), SCORE_FONT_SIZE)
-    bbox = draw.textbbox((0, 0), score_text, font=score_font)
-    score_text_width = bbox[2] - bbox[0]
-    score_text_height = bbox[3] - bbox[1]
-
-    text_x = circle_x - score_text_width // 2
-    text_y = (
-        circle_y
-        - score_text_height // 2
-        - score_text_height // 2
-        + int(score_text_height * SCORE_TEXT_VERTICAL_OFFSET)
+def _init_render_worker(
+    shm_name: str,
+    mode: str,
+    size: tuple[int, int],
+    info: dict,
+    city_map: Graph,
+    bounds: dict,
+    positions: PixelPositions,
+) -> None:
+    """Attach to the shared decoded base map once per worker process."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    base_img = Image.frombuffer(mode, size, shm.buf, "raw", mode, 0, 1)
+    # Carry over metadata (ICC profile, dpi) so output matches sequential rendering
+    base_img.info.update(info)
+    _worker_state["shm"] = shm
+    _worker_state["base_img"] = base_img
+    _worker_state["city_map"] = city_map
+    _worker_state["bounds"] = bounds
+    _worker_state["positions"] = positions
+    # Pool workers exit without running atexit handlers when forked; multiprocessing
+    # runs its own finalizers on either start method
+    Finalize(None, _close_render_worker, exitpriority=0)
+
+
+def _close_render_worker() -> None:
+    """Let go of the map image before detaching from the memory it points into."""
+    _worker_state.pop("base_img", None)
+    shm = _worker_state.pop("shm", None)
+    if shm is not None:
+        shm.close()
+
+
+def _render_worker_task(route: Route) -> bytes:
+    return _encode_route(
+        route,
+        _worker_state["base_img"],
+        _worker_state["city_map"],
+        _worker_state["bounds"],
+        _worker_state["positions"],
     )
-    draw.text((text_x, text_y), score_text, fill=BLACK, font=score_font)
 
-    # Draw colored dashed border based on route value
-    border_color = _get_border_color_for_route_value(route.value)
-    _draw_dashed_border(
-        draw, image_width, image_height, border_color, int(BORDER_WIDTH / 1.5)
-    )
 
-    # Save the image
-    img.save(output_image_path, "JPEG", quality=100)
+def _render_routes_parallel(
+    routes: Iterable[Route],
+    base_img: Image.Image,
+    city_map: Graph,
+    bounds: dict,
+    positions: PixelPositions,
+    workers: int,
+) -> Iterator[bytes]:
+    """
+    Render routes over a process pool that shares one copy of the decoded map,
+    yielding encoded images in route order as they become available. Routes are
+    taken from the iterable only as slots free up, so a stream stays bounded.
+    """
+    # RGBX rows can be mapped by Pillow in place, so workers never copy the map
+    shared_img = base_img.convert("RGBX")
+    raw = shared_img.tobytes()
+    shm = shared_memory.SharedMemory(create=True, size=max(len(raw), 1))
+    try:
+        shm.buf[: len(raw)] = raw
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_render_worker,
+            initargs=(
+                shm.name,
+                shared_img.mode,
+                shared_img.size,
+                base_img.info,
+                city_map,
+                bounds,
+                positions,
+            ),
+        ) as executor:
+            in_flight = deque()
+            for route in routes:
+                in_flight.append(executor.submit(_render_worker_task, route))
+                if len(in_flight) >= workers * PARALLEL_CARDS_PER_WORKER:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+    finally:
+        shm.close()
+        shm.unlink()
 
 
 def visualize_route(
-    routes: list[Route],
-    city_map: dict,
+    routes: Iterable[Route],
+    city_map: Graph,
     map_path: str,
     bounds: dict | None = None,
+    workers: int | None = 1,
+    output: str | Path | BinaryIO | None = None,
+    incremental: bool = True,
+    image_format: str = "jpeg",
+    projection: Projection | None = None,
 ) -> str:
     """
     Visualize multiple routes on a map by drawing headers with city names,
     red dots at each city's coordinates, and green lines connecting them.
-    Generates individual JPEG images for each route and saves them to a zip file.
+    Generates individual JPEG images for each route and streams them into a zip file
+    as they are encoded, without writing temporary files.
 
     Args:
-        routes: List of Route objects to visualize
-        city_map: Dictionary mapping City to Location (from build_map())
+        routes: Route objects to visualize. Any iterable works, including a generator
+                such as stream_lines'; cards are written while it is still producing
+                routes, and only the cards in flight are held in memory.
+        city_map: Map graph with city coordinates (from build_map())
         map_path: Path to the map image file
         bounds: Optional dict with map bounds: {"min_lat": float, "max_lat": float, "min_lon": float, "max_lon": float}
                 If not provided, defaults to entire Earth: lat [-90, 90], lon [-180, 180]
+        workers: Number of processes to render with. None uses every CPU core.
+                 Images are written to the zip in route order either way.
+        output: Where to write the images: a ".zip" path, a directory path for loose
+                JPEG files, or a writable binary file object (or pipe) that receives
+                the zip stream. Defaults to route_visualizations.zip in OUTPUT_DIR.
+        incremental: Reuse cards from the previous output at the same path whose
+                     route, city coordinates, map image, bounds and render style are
+                     unchanged, according to the manifest kept next to the output.
+        image_format: "jpeg" for raster cards, or "svg" for small vector cards that
+                      share one copy of the base map written alongside them.
+        projection: How coordinates are placed on the map image (see projection.py).
+                    Defaults to Equirectangular over bounds. City pixel positions are
+                    computed once per map image, bounds and projection, and cached.
 
     Returns:
-        str: Path to the generated zip file containing all route visualizations
+        str: Path to the generated zip file (or directory) containing all route
+             visualizations; the file object's name, if any, for stream output
     """
     # Default bounds for entire Earth
     if bounds is None:
@@ -456,37 +540,136 @@ def visualize_route(
             "max_lon": 180.0,  # International Date Line (east)
         }
 
-    # Create output directory if it doesn't exist
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    if projection is None:
+        projection = Equirectangular()
+
+    if output is None:
+        output = OUTPUT_DIR / "route_visualizations.zip"
+
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format: {image_format}")
+    suffix = IMAGE_FORMATS[image_format]
+
+    map_digest = _file_digest(map_path)
+    style_digest = _render_style_digest(image_format)
+
+    with RouteImageSink(output) as sink:
+        if image_format == "svg":
+            _write_svg_base_map(sink, map_path, map_digest, incremental)
 
-    # Load the map image once
-    base_img = Image.open(map_path)
+        # Only the image header is read here; the map is decoded when rendering
+        with Image.open(map_path) as map_img:
+            map_size = map_img.size
+        positions = city_pixel_positions(
+            city_map, map_size, bounds, projection, map_digest
+        )
+
+        # Cards taken from routes but not yet written, in route order: (name,
+        # fingerprint, reused). Rendering runs ahead of writing by at most its pool.
+        pending = deque()
+        counts = {"total": 0, "rendered": 0}
+
+        def routes_to_render() -> Iterator[Route]:
+            for route in routes:
+                counts["total"] += 1
+                name = f"{route.value}_{route.a.name}_{route.b.name}{suffix}"
+                fingerprint = _route_fingerprint(
+                    route, city_map, map_digest, bounds, projection, style_digest
+                )
+                reused = incremental and sink.can_reuse(name, fingerprint)
+                if reused and not pending:
+                    sink.reuse(name, fingerprint)
+                    continue
+                pending.append((name, fingerprint, reused))
+                if not reused:
+                    yield route
+
+        if image_format == "svg":
+            images = _render_routes_svg(
+                routes_to_render(), map_path, map_size, city_map, bounds, positions
+            )
+        else:
+            images = _render_routes(
+                routes_to_render(), map_path, city_map, bounds, positions, workers
+            )
+
+        # Write each image out as soon as it is encoded, keeping route order
+        for image in images:
+            name, fingerprint, reused = pending.popleft()
+            while reused:
+                sink.reuse(name, fingerprint)
+                name, fingerprint, reused = pending.popleft()
+            sink.write(name, image, fingerprint)
+            counts["rendered"] += 1
+        for name, fingerprint, _ in pending:
+            sink.reuse(name, fingerprint)
+
+    print(f"Rendered {counts['rendered']} of {counts['total']} route cards")
+    return sink.location
+
+
+def _render_routes(
+    routes: Iterable[Route],
+    map_path: str,
+    city_map: Graph,
+    bounds: dict,
+    positions: PixelPositions,
+    workers: int | None,
+) -> Iterator[bytes]:
+    """Yield the encoded card of each route in order."""
+    routes = iter(routes)
+    first = next(routes, None)
+    if first is None:
+        return
+    routes = chain([first], routes)
+
+    # Load and decode the map image once, with the shared header band applied
+    base_img = _prepare_base_image(Image.open(map_path))
     IMAGE_WIDTH, IMAGE_HEIGHT = base_img.size
     print(f"Map dimensions loaded: {IMAGE_WIDTH}x{IMAGE_HEIGHT}")
 
-    # Generate individual images and collect their paths
-    image_paths = []
-    for route in routes:
-        image_path = OUTPUT_DIR / f"{route.value}_{route.a.name}_{route.b.name}.jpeg"
-        _visualize_single_route(
-            route,
-            str(image_path),
-            base_img,
-            IMAGE_WIDTH,
-            IMAGE_HEIGHT,
-            city_map,
-            bounds,
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers > 1:
+        yield from _render_routes_parallel(
+            routes, base_img, city_map, bounds, positions, workers
         )
-        image_paths.append(image_path)
+    else:
+        for route in routes:
+            yield _encode_route(route, base_img, city_map, bounds, positions)
 
-    # Create zip file containing all images
-    zip_path = OUTPUT_DIR / "route_visualizations.zip"
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for image_path in image_paths:
-            zip_file.write(image_path, arcname=image_path.name)
 
-    # Clean up individual JPEG files
-    for image_path in image_paths:
-        image_path.unlink()
+def _svg_base_map_name(map_path: str) -> str:
+    return SVG_BASE_MAP_NAME + Path(map_path).suffix.lower()
 
-    return str(zip_path)
+
+def _write_svg_base_map(
+    sink: RouteImageSink, map_path: str, map_digest: str, incremental: bool
+) -> None:
+    """Store the shared base map that every vector card links to."""
+    name = _svg_base_map_name(map_path)
+    if incremental and sink.can_reuse(name, map_digest):
+        sink.reuse(name, map_digest)
+    else:
+        sink.write(name, Path(map_path).read_bytes(), map_digest)
+
+
+def _render_routes_svg(
+    routes: Iterable[Route],
+    map_path: str,
+    map_size: tuple[int, int],
+    city_map: Graph,
+    bounds: dict,
+    positions: PixelPositions,
+) -> Iterator[bytes]:
+    """Yield the vector card of each route in order."""
+    # Vector cards never decode the map
+    image_width, image_height = map_size
+    map_href = _svg_base_map_name(map_path)
+
+    for route in routes:
+        layout = route_layout(
+            route, city_map, bounds, image_width, image_height, positions
+        )
+        yield route_svg(layout, map_href, image_width, image_height).encode("utf-8")
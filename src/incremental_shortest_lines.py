@@ -0,0 +1,146 @@
+from array import array
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+from src.all_shortest_lines import single_source_dijkstra
+from src.data_types.distance_matrix import UNREACHABLE, DistanceMatrix
+from src.data_types.graph import Graph
+from src.data_types.pair_table import PairTable
+
+LineChanges = Dict[frozenset, Tuple[int, int]]
+
+
+def update_connection(
+    city_map: Graph,
+    matrix: DistanceMatrix,
+    a: Hashable,
+    b: Hashable,
+    distance: int | None,
+) -> Tuple[Graph, DistanceMatrix, LineChanges]:
+    """
+    Add, re-weight or remove (distance None) the track between a and b and update
+    the all-pairs distances without recomputing the whole table.
+
+    Shorter tracks only touch pairs that can now route through the new track.
+    Longer or removed tracks only re-run the search from cities whose shortest lines
+    used the old track. Returns the new graph, the new matrix and the changed pairs
+    as {frozenset({x, y}): (old_distance, new_distance)}.
+    """
+    i, j = city_map.index[a], city_map.index[b]
+    old_distance = city_map.edge_weight(i, j)
+    if i == j or old_distance == distance:
+        return city_map, matrix, {}
+
+    new_map = city_map.with_connection(i, j, distance)
+    distances = array("i", matrix.distances)
+    predecessors = array("i", matrix.predecessors)
+
+    if distance is not None and (old_distance is None or distance < old_distance):
+        changed = _shorten_connection(
+            distances, predecessors, len(city_map), i, j, distance
+        )
+    else:
+        changed = _lengthen_connection(
+            distances, predecessors, new_map, i, j, old_distance
+        )
+
+    cities = city_map.cities
+    changes = {
+        frozenset({cities[x], cities[y]}): (old, new)
+        for (x, y), (old, new) in changed.items()
+    }
+    return new_map, DistanceMatrix(cities, distances, predecessors), changes
+
+
+def apply_line_changes(
+    all_distances: PairTable | Dict[frozenset, int], changes: LineChanges
+) -> None:
+    """Bring a table from all_possible_lines up to date with update_connection's report."""
+    if isinstance(all_distances, PairTable):
+        for (x, y), (_, new_distance) in changes.items():
+            all_distances.set(x, y, new_distance)
+        return
+
+    for pair, (_, new_distance) in changes.items():
+        if new_distance == UNREACHABLE:
+            all_distances.pop(pair, None)
+        else:
+            all_distances[pair] = new_distance
+
+
+def sources_using_connection(
+    distances: Sequence[int], n: int, i: int, j: int, distance: int
+) -> List[int]:
+    """
+    Cities whose shortest line tree could contain the i-j track of this length: the
+    only searches that need re-running when it gets longer or is removed.
+    """
+    return [
+        x
+        for x in range(n)
+        if distances[x * n + i] != UNREACHABLE
+        and (
+            distances[x * n + i] + distance == distances[x * n + j]
+            or distances[x * n + j] + distance == distances[x * n + i]
+        )
+    ]
+
+
+def _shorten_connection(
+    distances: array,
+    predecessors: array,
+    n: int,
+    i: int,
+    j: int,
+    distance: int,
+) -> Dict[Tuple[int, int], Tuple[int, int]]:
+    changed = {}
+    # Rows i and j can change below, so route through a snapshot of them
+    row_i = distances[i * n : (i + 1) * n]
+    row_j = distances[j * n : (j + 1) * n]
+    pred_i = predecessors[i * n : (i + 1) * n]
+    pred_j = predecessors[j * n : (j + 1) * n]
+
+    for u, v, row_u, row_v, pred_v in (
+        (i, j, row_i, row_j, pred_j),
+        (j, i, row_j, row_i, pred_i),
+    ):
+        # Cities that reach v faster by going through u and then the track
+        sources = [x for x in range(n) if row_u[x] + distance < row_v[x]]
+        # Cities that v reaches faster than u does, even after paying for the track
+        targets = [y for y in range(n) if distance + row_v[y] < row_u[y]]
+
+        for x in sources:
+            through_track = row_u[x] + distance
+            base = x * n
+            for y in targets:
+                candidate = through_track + row_v[y]
+                if candidate < distances[base + y]:
+                    # (y, x) is updated by the mirrored pass, so report each pair once
+                    if x < y:
+                        changed[(x, y)] = (distances[base + y], candidate)
+                    distances[base + y] = candidate
+                    predecessors[base + y] = u if y == v else pred_v[y]
+    return changed
+
+
+def _lengthen_connection(
+    distances: array,
+    predecessors: array,
+    new_map: Graph,
+    i: int,
+    j: int,
+    old_distance: int,
+) -> Dict[Tuple[int, int], Tuple[int, int]]:
+    n = len(new_map)
+    changed = {}
+    for x in sources_using_connection(distances, n, i, j, old_distance):
+        dist, prev = single_source_dijkstra(x, new_map)
+        base = x * n
+        for y in range(n):
+            old = distances[base + y]
+            if dist[y] != old:
+                key = (x, y) if x < y else (y, x)
+                changed.setdefault(key, (old, dist[y]))
+        distances[base : base + n] = array("i", dist)
+        predecessors[base : base + n] = array("i", prev)
+    return changed
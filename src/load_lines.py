@@ -1,17 +1,28 @@
-from typing import List
+from typing import Dict, List
 
+from src.data_types.city_registry import US_CITIES, CityRegistry
+from src.data_types.pair_table import pair_id
 from src.data_types.route import Route
 from src.starting_data.load_route_json import load_updated_route_json
 
 
-def load_lines() -> List[Route]:
-    json_routes = load_updated_route_json()
-    routes = [Route.from_json(json_route) for json_route in json_routes]
+# json_routes defaults to the updated US deck.
+# city_registry resolves city names on maps other than the US board.
+def load_lines(
+    json_routes: List[Dict] | None = None,
+    city_registry: CityRegistry | None = None,
+) -> List[Route]:
+    if json_routes is None:
+        json_routes = load_updated_route_json()
+    routes = [Route.from_json(json_route, city_registry) for json_route in json_routes]
 
     # verify no duplicate connections
+    id_of = (US_CITIES if city_registry is None else city_registry).id_of
     seen_connections = set()
     for route in routes:
-        conn = frozenset({route.a, route.b})
+        i, j = id_of(route.a), id_of(route.b)
+        # A route from a city to itself has no pair id; key it apart by its city
+        conn = pair_id(i, j) if i != j else -1 - i
         if conn in seen_connections:
             print(f"Duplicate connection found: {route.a} - {route.b}")
         else:
@@ -1,22 +1,68 @@
-from src.data_types.cities import City, to_city
-from src.data_types.location import Location
+from pathlib import Path
+from typing import Dict, Mapping, Tuple
+
+from src.data_types.city_registry import US_CITIES, AnyCity, CityRegistry
+from src.data_types.graph import Graph
+from src.data_types.track_colors import color_mask
+from src.map_bundle import load_map_bundle
 from src.starting_data.load_location_json import load_all_locations_json
 
 
-def build_map() -> dict[City, Location]:
-    locations_json_map = load_all_locations_json()
+def build_map(
+    locations_json_map: Mapping[AnyCity | str, Dict] | None = None,
+    city_registry: CityRegistry | None = None,
+    bundle_path: str | Path | None = None,
+) -> Graph:
+    """
+    Build the map graph from location data keyed by city, by default the US board
+    with the City preset. Other data (e.g. from load_locations_dir) has its cities
+    interned into city_registry, or a new registry, in the order they appear.
+    bundle_path instead memory-maps a map compiled by map_bundle, skipping the JSON.
+    """
+    if bundle_path is not None:
+        return load_map_bundle(bundle_path).graph
+    if locations_json_map is None:
+        locations_json_map = load_all_locations_json()
+        if city_registry is None:
+            city_registry = US_CITIES
+    if city_registry is None:
+        city_registry = CityRegistry()
 
-    city_map = {
-        city: Location(city, coordinates=locations_json_map[city].get("coordinates"))
-        for city in City
+    locations_json_map = {
+        city_registry.intern(city): json_data
+        for city, json_data in locations_json_map.items()
     }
+    for json_data in locations_json_map.values():
+        for conn in json_data.get("connections", []):
+            city_registry.intern(conn["city"])
+
+    cities = list(city_registry)
+    index = {city: i for i, city in enumerate(cities)}
+    coordinates = [
+        locations_json_map.get(city, {}).get("coordinates") for city in cities
+    ]
 
+    edges: Dict[Tuple[int, int], int] = {}
+    colors: Dict[Tuple[int, int], int] = {}
+    tracks: Dict[Tuple[int, int], int] = {}
     for city, json_data in locations_json_map.items():
-        location = city_map[city]
         for conn in json_data.get("connections", []):
-            other_city = to_city(conn["city"])
+            other_city = city_registry.get(conn["city"])
             distance = conn["distance"]
-            other_location = city_map[other_city]
-            location.add_connection(other_location, distance)
+            i, j = index[city], index[other_city]
+            key = (i, j) if i < j else (j, i)
+
+            existing_distance = edges.setdefault(key, distance)
+            if existing_distance != distance:
+                raise ValueError(
+                    f"Conflicting distances for connection between "
+                    f"{city} and {other_city}: "
+                    f"{distance} vs {existing_distance}"
+                )
+
+            # Both ends list the connection; keep every color and track either end mentions
+            track_colors = conn.get("colors", [])
+            colors[key] = colors.get(key, 0) | color_mask(track_colors)
+            tracks[key] = max(tracks.get(key, 1), len(track_colors))
 
-    return city_map
+    return Graph.from_edges(cities, coordinates, edges, colors, tracks)
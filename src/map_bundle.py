@@ -0,0 +1,241 @@
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence
+
+from src.data_types.cities import City
+from src.data_types.city_registry import US_CITIES, CityRegistry, city_key
+from src.data_types.graph import Graph
+from src.data_types.route import Route
+
+# Layout, little-endian, every section padded to 8 bytes:
+#   header
+#   n*2 float64 coordinates (lat, lon; NaN when a city has none)
+#   n+1 int32 offsets, then m int32 neighbors, weights and colors (m = 2 * edges)
+#   r*3 int32 routes (a id, b id, value) of every deck, one deck after another
+#   m uint8 tracks
+#   metadata JSON: city names, deck names and sizes
+#   crc32 of everything before it
+_MAGIC = b"TTRMAP\x00\x01"
+_HEADER = struct.Struct("<8sIIII")
+_CHECKSUM = struct.Struct("<I")
+_ALIGNMENT = 8
+
+# Metadata value for bundles whose cities are the members of the City enum
+_US_PRESET = "City"
+
+
+@dataclass(frozen=True, slots=True)
+class MapBundle:
+    """A loaded bundle: the map graph and its route decks by name."""
+
+    graph: Graph
+    decks: Dict[str, List[Route]]
+    city_registry: CityRegistry
+
+
+def compile_map_bundle(
+    bundle_path: str | Path,
+    city_map: Graph,
+    decks: Mapping[str, Sequence[Route]] | None = None,
+) -> None:
+    """Pack city_map and any route decks into one bundle file at bundle_path."""
+    decks = decks or {}
+    n = len(city_map)
+    m = len(city_map.neighbors)
+    index = city_map.index
+
+    coordinates = array("d")
+    for coordinate in city_map.coordinates:
+        if coordinate is None:
+            coordinates.extend((math.nan, math.nan))
+        else:
+            coordinates.extend((coordinate["lat"], coordinate["lon"]))
+
+    routes = array("i")
+    for deck in decks.values():
+        for route in deck:
+            routes.extend((index[route.a], index[route.b], route.value))
+
+    is_us_preset = all(isinstance(city, City) for city in city_map.cities)
+    metadata = {
+        "preset": _US_PRESET if is_us_preset else None,
+        "cities": [city.value for city in city_map.cities],
+        "decks": [[name, len(deck)] for name, deck in decks.items()],
+    }
+
+    sections = [
+        coordinates,
+        array("i", city_map.offsets),
+        array("i", city_map.neighbors),
+        array("i", city_map.weights),
+        array("i", city_map.colors),
+        routes,
+        array("B", city_map.tracks),
+    ]
+    if sys.byteorder != "little":
+        for section in sections:
+            section.byteswap()
+
+    body = bytearray(_HEADER.pack(_MAGIC, n, m, len(routes) // 3, 0))
+    for section in sections:
+        body += section.tobytes()
+        body += bytes(-len(body) % _ALIGNMENT)
+    metadata_bytes = json.dumps(metadata, separators=(",", ":")).encode()
+    body += metadata_bytes
+    _HEADER.pack_into(body, 0, _MAGIC, n, m, len(routes) // 3, len(metadata_bytes))
+    body += _CHECKSUM.pack(zlib.crc32(body))
+
+    # Write to a temporary file and swap it in so readers never see a partial bundle
+    bundle_path = Path(bundle_path)
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = bundle_path.with_name(bundle_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, bundle_path)
+
+
+def load_map_bundle(bundle_path: str | Path, verify: bool = False) -> MapBundle:
+    """
+    Memory-map a bundle. The graph's CSR arrays are views straight into the
+    mapping, so loading copies nothing but the city table and coordinates.
+    The file size is always checked against the header, which catches truncated
+    bundles; verify also checks the stored checksum, at the cost of one pass over
+    the file.
+    """
+    with open(bundle_path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+
+    if len(view) < _HEADER.size + _CHECKSUM.size:
+        raise ValueError(f"{bundle_path} is not a map bundle")
+    magic, n, m, route_count, metadata_size = _HEADER.unpack_from(view, 0)
+    if magic != _MAGIC:
+        raise ValueError(f"{bundle_path} is not a map bundle")
+    if len(view) != _bundle_size(n, m, route_count, metadata_size):
+        raise ValueError(f"{bundle_path} is truncated or corrupt")
+    if verify:
+        (checksum,) = _CHECKSUM.unpack_from(view, len(view) - _CHECKSUM.size)
+        if zlib.crc32(view[: len(view) - _CHECKSUM.size]) != checksum:
+            raise ValueError(f"{bundle_path} is corrupt")
+
+    position = _HEADER.size
+
+    def take(typecode: str, count: int) -> Sequence:
+        nonlocal position
+        size = count * struct.calcsize(typecode)
+        section = view[position : position + size]
+        position += size + (-(position + size) % _ALIGNMENT)
+        if sys.byteorder != "little":
+            # Only big-endian hosts pay for a copy
+            swapped = array(typecode, section.tobytes())
+            swapped.byteswap()
+            return swapped
+        return section.cast(typecode)
+
+    coordinates = take("d", 2 * n)
+    offsets = take("i", n + 1)
+    neighbors = take("i", m)
+    weights = take("i", m)
+    colors = take("i", m)
+    routes = take("i", 3 * route_count)
+    tracks = take("B", m)
+    metadata = json.loads(bytes(view[position : position + metadata_size]))
+
+    if metadata["preset"] == _US_PRESET:
+        city_registry = US_CITIES
+        cities = [city_registry.get(name) for name in metadata["cities"]]
+    else:
+        city_registry = CityRegistry(metadata["cities"])
+        cities = list(city_registry)
+
+    graph = Graph(
+        cities,
+        [
+            None
+            if math.isnan(coordinates[2 * i])
+            else {"lat": coordinates[2 * i], "lon": coordinates[2 * i + 1]}
+            for i in range(n)
+        ],
+        offsets,
+        neighbors,
+        weights,
+        colors,
+        tracks,
+    )
+
+    decks: Dict[str, List[Route]] = {}
+    start = 0
+    for name, count in metadata["decks"]:
+        decks[name] = [
+            Route(cities[routes[k]], cities[routes[k + 1]], routes[k + 2])
+            for k in range(3 * start, 3 * (start + count), 3)
+        ]
+        start += count
+
+    return MapBundle(graph, decks, city_registry)
+
+
+def _bundle_size(n: int, m: int, route_count: int, metadata_size: int) -> int:
+    """The file size a header describes, following the layout above."""
+    size = _HEADER.size
+    for section in (16 * n, 4 * (n + 1), 4 * m, 4 * m, 4 * m, 12 * route_count, m):
+        size += section + (-(size + section) % _ALIGNMENT)
+    return size + metadata_size + _CHECKSUM.size
+
+
+def export_map_json(bundle: MapBundle, directory: str | Path) -> None:
+    """
+    Write a bundle back out in the starting_data layout: locations/<city>.json per
+    city and routes/<deck>.json per deck, readable by load_locations_dir and load_lines.
+    """
+    directory = Path(directory)
+    (directory / "locations").mkdir(parents=True, exist_ok=True)
+    for name, location in bundle.graph.to_locations_json().items():
+        file_path = directory / "locations" / f"{city_key(name).lower()}.json"
+        with open(file_path, "w") as f:
+            json.dump(location, f, indent=2)
+
+    if bundle.decks:
+        (directory / "routes").mkdir(parents=True, exist_ok=True)
+    for name, deck in bundle.decks.items():
+        with open(directory / "routes" / f"{name}.json", "w") as f:
+            json.dump([route.to_json() for route in deck], f, indent=2)
+
+
+def _main(argv: List[str]) -> int:
+    """
+    python -m src.map_bundle compile BUNDLE   pack the US map and its route decks
+    python -m src.map_bundle export BUNDLE DIR   unpack a bundle into JSON files
+    """
+    if len(argv) == 2 and argv[0] == "compile":
+        # Imported here so loading a bundle never touches the JSON loaders
+        from src.load_lines import load_lines
+        from src.load_map import build_map
+        from src.starting_data.load_route_json import (
+            load_original_route_json,
+            load_updated_route_json,
+        )
+
+        decks = {
+            "original": load_lines(load_original_route_json()),
+            "updated_2025": load_lines(load_updated_route_json()),
+        }
+        compile_map_bundle(argv[1], build_map(), decks)
+        return 0
+    if len(argv) == 3 and argv[0] == "export":
+        export_map_json(load_map_bundle(argv[1], verify=True), argv[2])
+        return 0
+    print(_main.__doc__, file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
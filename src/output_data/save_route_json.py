@@ -1,18 +1,45 @@
 import json
 from datetime import date
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List
 
 from src.data_types.route import Route
 
 BASE_PATH = Path(__file__).parent
 
 
-def save_route_json(routes: List[Route]) -> None:
+def _default_path() -> Path:
+    today = date.today()
+    return BASE_PATH / "routes" / f"{today.year}_{today.month}_updated_routes.json"
+
+
+def save_route_json(routes: List[Route], file_path: str | Path | None = None) -> None:
     json_routes = [route.to_json() for route in routes]
     json_routes.sort(key=lambda r: (r["a"], r["b"]))
 
-    today = date.today()
-    file_path = BASE_PATH / "routes" / f"{today.year}_{today.month}_updated_routes.json"
+    if file_path is None:
+        file_path = _default_path()
     with open(file_path, "w") as f:
         json.dump(json_routes, f, indent=2)
+
+
+def stream_route_json(
+    routes: Iterable[Route], file_path: str | Path | None = None
+) -> Iterator[Route]:
+    """
+    Write routes to the deck file as they pass through, then yield each one on.
+
+    The file is laid out like save_route_json's, but rows keep the order they arrive
+    in rather than being sorted, so nothing is held back; stream_lines' order is
+    fixed by the map. The file is only complete once the stream is exhausted.
+    """
+    if file_path is None:
+        file_path = _default_path()
+    with open(file_path, "w") as f:
+        separator = "[\n"
+        for route in routes:
+            row = json.dumps(route.to_json(), indent=2).replace("\n", "\n  ")
+            f.write(f"{separator}  {row}")
+            separator = ",\n"
+            yield route
+        f.write("[]" if separator == "[\n" else "\n]")
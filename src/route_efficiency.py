@@ -1,22 +1,40 @@
-def _evaluate_route_efficiency(all_distances, original_lines):
-    total_efficiency = 0.0
+from src.data_types.distance_matrix import UNREACHABLE
+from src.data_types.pair_table import PairTable
+
+
+def _distance_lookup(all_distances):
+    """
+    (a, b) -> shortest distance, from a PairTable or a frozenset-keyed dict. Both
+    raise KeyError for cities with no connecting line, as the dict always has.
+    """
+    if isinstance(all_distances, PairTable):
+
+        def table_distance(a, b):
+            distance = all_distances.distance(a, b)
+            if distance == UNREACHABLE:
+                raise KeyError(frozenset({a, b}))
+            return distance
+
+        return table_distance
+    return lambda a, b: all_distances[frozenset({a, b})]
 
+
+def _evaluate_route_efficiency(all_distances, original_lines):
+    # One lookup per route; the split below reuses the computed efficiencies
+    shortest_distance = _distance_lookup(all_distances)
+    efficiencies = []
     for route in original_lines:
-        connection = frozenset({route.a, route.b})
-        shortest_distance = all_distances[connection]
-        total_efficiency += route.value / shortest_distance
+        a, b = route.a, route.b
+        efficiencies.append((a, b, route.value / shortest_distance(a, b)))
 
+    total_efficiency = 0.0
+    for _, _, efficiency in efficiencies:
+        total_efficiency += efficiency
     average_efficiency = total_efficiency / len(original_lines)
 
     routes_above_average = []
     routes_below_average = []
-
-    for route in original_lines:
-        connection = frozenset({route.a, route.b})
-        shortest_distance = all_distances[connection]
-        efficiency = route.value / shortest_distance
-
-        a, b = connection
+    for a, b, efficiency in efficiencies:
         if efficiency >= average_efficiency:
             routes_above_average.append((a, b, efficiency))
         else:
@@ -40,7 +58,7 @@ def print_route_efficiency_report(all_distances, original_lines):
 
 
 def _print_efficiency(all_distances, a, b, efficiency):
-    distance = all_distances[frozenset({a, b})]
+    distance = _distance_lookup(all_distances)(a, b)
     print(
         f"█[{a.value} <-> {b.value}]"
         f"█ Efficiency: {efficiency:.4f} "
@@ -1,75 +1,110 @@
 import heapq
-from itertools import count
-from typing import Dict
+from typing import Hashable, Iterable, List, Sequence, Tuple
 
 from src.data_types.cities import City
-from src.data_types.location import Location
+from src.data_types.distance_matrix import NO_PREDECESSOR, UNREACHABLE, DistanceMatrix
+from src.data_types.graph import Graph
 
 
-def shortest_line(start: City, end: City, city_map: Dict[City, Location]):
+def shortest_line(start: City, end: City, city_map: Graph):
     return _dijkstra(start, end, city_map)
 
 
-def shortest_line_include_stops(start: City, end: City, city_map: Dict[City, Location]):
+def shortest_line_include_stops(start: City, end: City, city_map: Graph):
     return _dijkstra(start, end, city_map, include_stops=True)
 
 
-def _dijkstra(
-    start: City, end: City, city_map: Dict[City, Location], include_stops=False
-):
-    counter = count()
-    heap = [(0, next(counter), start)]
-    dist = {start: 0}
-    prev = {start: None}
+def shortest_lines_stops(
+    matrix: DistanceMatrix, pairs: Iterable[Tuple[Hashable, Hashable]]
+) -> List[Tuple[List[Hashable], List[int]] | None]:
+    """
+    Look up the stops and per-leg distances of many shortest lines at once from the
+    predecessor data of an all-pairs matrix. Each query walks its own path and runs no
+    search. Unreachable pairs come back as None.
+    """
+    n = matrix.size
+    cities, index = matrix.cities, matrix.index
+    distances, predecessors = matrix.distances, matrix.predecessors
+
+    results = []
+    for start, end in pairs:
+        s, t = index[start], index[end]
+        base = s * n
+        if distances[base + t] == UNREACHABLE:
+            results.append(None)
+            continue
+
+        back_path = [t]
+        while back_path[-1] != s:
+            back_path.append(predecessors[base + back_path[-1]])
+        back_path.reverse()
+
+        stops = [cities[i] for i in back_path]
+        legs = [
+            distances[base + back_path[k + 1]] - distances[base + back_path[k]]
+            for k in range(len(back_path) - 1)
+        ]
+        results.append((stops, legs))
+    return results
+
+
+def format_line_stops(stops: Sequence[City], legs: Sequence[int]) -> str:
+    path_with_distances = []
+    for city, distance in zip(stops, legs):
+        path_with_distances.append(city.value)
+        path_with_distances.append(f"{'🚂' * distance} ({distance})")
+    path_with_distances.append(stops[-1].name)
+    return " -> ".join(path_with_distances)
+
+
+def _dijkstra(start: City, end: City, city_map: Graph, include_stops=False):
+    offsets, neighbors, weights = city_map.offsets, city_map.neighbors, city_map.weights
+    start_index = city_map.index[start]
+    end_index = city_map.index[end]
+
+    heap = [(0, start_index)]
+    dist = {start_index: 0}
+    prev = {start_index: NO_PREDECESSOR}
 
     while heap:
-        current_distance, _, current_city = heapq.heappop(heap)
+        current_distance, current = heapq.heappop(heap)
 
-        if current_city == end:
+        if current == end_index:
             break
 
-        if current_distance != dist[current_city]:
+        if current_distance != dist[current]:
             continue
 
-        for neighbor, distance in city_map[current_city].connections:
-            distance_through_current = current_distance + distance
-            city = neighbor.name
+        for e in range(offsets[current], offsets[current + 1]):
+            neighbor = neighbors[e]
+            distance_through_current = current_distance + weights[e]
 
-            if city not in dist or distance_through_current < dist[city]:
-                dist[city] = distance_through_current
-                prev[city] = current_city
-                heapq.heappush(heap, (distance_through_current, next(counter), city))
+            if neighbor not in dist or distance_through_current < dist[neighbor]:
+                dist[neighbor] = distance_through_current
+                prev[neighbor] = current
+                heapq.heappush(heap, (distance_through_current, neighbor))
 
     if include_stops:
-        path = _reconstruct_path_with_distances(prev, end, city_map)
-        return dist[end], path
+        path = _reconstruct_path_with_distances(prev, dist, end_index, city_map)
+        return dist[end_index], path
     else:
-        return dist[end], None
+        return dist[end_index], None
 
 
 def _reconstruct_path_with_distances(
-    prev: Dict[City, City | None],
-    end: City,
-    city_map: Dict[City, Location],
+    prev: dict[int, int],
+    dist: dict[int, int],
+    end: int,
+    city_map: Graph,
 ) -> str:
-    back_path = []
-    current_city = end
+    back_path: List[int] = []
+    current = end
 
-    while current_city is not None:
-        back_path.append(current_city)
-        current_city = prev[current_city]
+    while current != NO_PREDECESSOR:
+        back_path.append(current)
+        current = prev[current]
 
     back_path.reverse()
-    path_with_distances = []
-
-    for i in range(len(back_path) - 1):
-        city = back_path[i]
-        next_city = back_path[i + 1]
-
-        for neighbor, distance in city_map[city].connections:
-            if neighbor.name == next_city:
-                path_with_distances.append(city.value)
-                path_with_distances.append(f"{'🚂' * distance} ({distance})")
-                break
-    path_with_distances.append(back_path[-1].name)
-    return " -> ".join(path_with_distances)
+    stops = [city_map.cities[i] for i in back_path]
+    legs = [dist[back_path[k + 1]] - dist[back_path[k]] for k in range(len(back_path) - 1)]
+    return format_line_stops(stops, legs)
@@ -3,46 +3,13 @@ from pathlib import Path
 from typing import Dict
 
 from src.data_types.cities import City
+from src.data_types.city_registry import city_key
 
 BASE_PATH = Path(__file__).parent
 
+# Location files are named after each city, e.g. "Sault Ste. Marie" -> sault_ste_marie.json
 file_city_map: Dict[str, City] = {
-    "atlanta.json": City.ATLANTA,
-    "boston.json": City.BOSTON,
-    "calgary.json": City.CALGARY,
-    "charleston.json": City.CHARLESTON,
-    "chicago.json": City.CHICAGO,
-    "dallas.json": City.DALLAS,
-    "denver.json": City.DENVER,
-    "duluth.json": City.DULUTH,
-    "el_paso.json": City.EL_PASO,
-    "helena.json": City.HELENA,
-    "houston.json": City.HOUSTON,
-    "kansas_city.json": City.KANSAS_CITY,
-    "las_vegas.json": City.LAS_VEGAS,
-    "little_rock.json": City.LITTLE_ROCK,
-    "los_angeles.json": City.LOS_ANGELES,
-    "miami.json": City.MIAMI,
-    "montreal.json": City.MONTREAL,
-    "nashville.json": City.NASHVILLE,
-    "new_orleans.json": City.NEW_ORLEANS,
-    "new_york.json": City.NEW_YORK,
-    "oklahoma_city.json": City.OKLAHOMA_CITY,
-    "omaha.json": City.OMAHA,
-    "phoenix.json": City.PHOENIX,
-    "pittsburgh.json": City.PITTSBURGH,
-    "portland.json": City.PORTLAND,
-    "raleigh.json": City.RALEIGH,
-    "salt_lake_city.json": City.SALT_LAKE_CITY,
-    "san_francisco.json": City.SAN_FRANCISCO,
-    "santa_fe.json": City.SANTA_FE,
-    "sault_ste_marie.json": City.SAULT_STE_MARIE,
-    "seattle.json": City.SEATTLE,
-    "st_louis.json": City.ST_LOUIS,
-    "toronto.json": City.TORONTO,
-    "vancouver.json": City.VANCOUVER,
-    "washington_d_c.json": City.WASHINGTON_D_C,
-    "winnipeg.json": City.WINNIPEG,
+    f"{city_key(city.value).lower()}.json": city for city in City
 }
 
 
@@ -63,3 +30,29 @@ def load_all_locations_json() -> list[City, Dict]:
         city_json_map[city] = json_location
 
     return city_json_map
+
+
+def load_locations_dir(directory: str | Path) -> Dict[str, Dict]:
+    """
+    Load every location file in directory without a preset city list, keyed by
+    display name. A file may name its city with a "name" field; otherwise the name
+    is the one used by connections elsewhere whose file name it matches.
+    """
+    locations_by_file: Dict[str, Dict] = {}
+    for file_path in sorted(Path(directory).glob("*.json")):
+        with open(file_path, "r") as f:
+            locations_by_file[file_path.stem] = json.load(f)
+
+    referenced_names = {
+        city_key(conn["city"]).lower(): conn["city"]
+        for json_location in locations_by_file.values()
+        for conn in json_location.get("connections", [])
+    }
+
+    city_json_map: Dict[str, Dict] = {}
+    for stem, json_location in locations_by_file.items():
+        name = json_location.get("name") or referenced_names.get(stem)
+        if name is None:
+            raise ValueError(f"Cannot tell which city {stem}.json describes")
+        city_json_map[name] = json_location
+    return city_json_map
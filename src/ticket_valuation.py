@@ -0,0 +1,226 @@
+import itertools
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from src.create_new_lines import AVERAGE_ROUTE_EFFICIENCY
+from src.data_types.distance_matrix import UNREACHABLE
+from src.data_types.pair_table import PairTable
+from src.data_types.route import Route
+
+# How a scaled distance becomes a whole ticket value. "round" is Python's round(),
+# the rule build_lines uses.
+ROUNDING_MODES: Dict[str, Callable[[float], int]] = {
+    "round": lambda x: int(round(x)),
+    "floor": math.floor,
+    "ceil": math.ceil,
+}
+
+# Multipliers tried around the fitted baseline when no grid is given
+DEFAULT_SPREAD = 0.10
+DEFAULT_STEP = 0.005
+
+
+@dataclass(frozen=True, slots=True)
+class ValuationParams:
+    """Ticket value = rounding(distance * multiplier), clamped to [floor, cap]."""
+
+    multiplier: float = AVERAGE_ROUTE_EFFICIENCY
+    rounding: str = "round"
+    floor: int = 1
+    cap: int | None = None
+
+    def value(self, distance: int) -> int:
+        value = ROUNDING_MODES[self.rounding](distance * self.multiplier)
+        value = max(value, self.floor)
+        return value if self.cap is None else min(value, self.cap)
+
+    def to_json(self) -> Dict:
+        return {
+            "multiplier": self.multiplier,
+            "rounding": self.rounding,
+            "floor": self.floor,
+            "cap": self.cap,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class SweepResult:
+    """
+    One candidate's score. baseline_error is the mean absolute difference between
+    the candidate's values and the printed values of the baseline deck; the
+    efficiency figures describe the deck the candidate would generate.
+    """
+
+    params: ValuationParams
+    baseline_error: float
+    exact_matches: int
+    mean_efficiency: float
+    efficiency_stdev: float
+    min_efficiency: float
+    max_efficiency: float
+
+    def to_json(self) -> Dict:
+        return {
+            **self.params.to_json(),
+            "baseline_error": self.baseline_error,
+            "exact_matches": self.exact_matches,
+            "mean_efficiency": self.mean_efficiency,
+            "efficiency_stdev": self.efficiency_stdev,
+            "min_efficiency": self.min_efficiency,
+            "max_efficiency": self.max_efficiency,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Sweep:
+    """All candidates, best first, and the multiplier fitted to the baseline."""
+
+    baseline_multiplier: float
+    results: List[SweepResult]
+
+    def best(self, count: int = 10) -> List[SweepResult]:
+        return self.results[:count]
+
+
+def fit_multiplier(baseline: Sequence[Route], table: PairTable) -> float:
+    """Least-squares multiplier taking shortest distances to the baseline's values."""
+    pairs = _baseline_pairs(baseline, table)
+    products = sum(distance * value * n for (distance, value), n in pairs.items())
+    squares = sum(distance * distance * n for (distance, _), n in pairs.items())
+    if not squares:
+        raise ValueError("The baseline deck has no tickets between connected cities")
+    return products / squares
+
+
+def valuation_grid(
+    multipliers: Iterable[float],
+    roundings: Iterable[str] = ("round",),
+    floors: Iterable[int] = (1,),
+    caps: Iterable[int | None] = (None,),
+) -> List[ValuationParams]:
+    """Every combination of the given settings."""
+    roundings = tuple(roundings)
+    for rounding in roundings:
+        if rounding not in ROUNDING_MODES:
+            raise ValueError(f"Unknown rounding mode: {rounding}")
+    return [
+        ValuationParams(multiplier, rounding, floor, cap)
+        for multiplier, rounding, floor, cap in itertools.product(
+            multipliers, roundings, tuple(floors), tuple(caps)
+        )
+    ]
+
+
+def multipliers_around(
+    center: float, spread: float = DEFAULT_SPREAD, step: float = DEFAULT_STEP
+) -> List[float]:
+    """
+    Evenly spaced multipliers from center - spread to center + spread; only center
+    when spread is 0.
+    """
+    if spread < 0 or step <= 0:
+        raise ValueError("The spread must be 0 or more and the step more than 0")
+    steps = int(round(spread / step))
+    return [round(center + step * k, 6) for k in range(-steps, steps + 1)]
+
+
+def sweep_valuations(
+    table: PairTable,
+    baseline: Sequence[Route],
+    grid: Sequence[ValuationParams] | None = None,
+) -> Sweep:
+    """
+    Score every candidate against the generated deck and the baseline deck at once.
+
+    Both decks are first reduced to counts per distinct shortest distance (and, for
+    the baseline, per printed value). A candidate's value only depends on the
+    distance, so each candidate costs one pass over the distinct distances, however
+    many pairs the map has. Results are ordered best first: lowest baseline error,
+    then most exact matches, then the tightest efficiency spread.
+    """
+    baseline_multiplier = fit_multiplier(baseline, table)
+    if grid is None:
+        grid = valuation_grid(multipliers_around(baseline_multiplier))
+
+    generated = Counter(d for _, _, d in table.pairs() if d > 0)
+    if not generated:
+        raise ValueError("The distance table has no pairs of connected cities")
+    baseline_pairs = _baseline_pairs(baseline, table)
+    distances = sorted(generated.keys() | {d for d, _ in baseline_pairs})
+    pair_count = sum(generated.values())
+    baseline_count = sum(baseline_pairs.values())
+
+    results = []
+    for params in grid:
+        values = {distance: params.value(distance) for distance in distances}
+
+        error = 0
+        exact = 0
+        for (distance, value), n in baseline_pairs.items():
+            miss = abs(values[distance] - value)
+            error += miss * n
+            if not miss:
+                exact += n
+
+        total = squares = 0.0
+        low, high = math.inf, -math.inf
+        for distance, n in generated.items():
+            ratio = values[distance] / distance
+            total += ratio * n
+            squares += ratio * ratio * n
+            low, high = min(low, ratio), max(high, ratio)
+        mean = total / pair_count
+
+        results.append(
+            SweepResult(
+                params=params,
+                baseline_error=error / baseline_count,
+                exact_matches=exact,
+                mean_efficiency=mean,
+                efficiency_stdev=math.sqrt(max(squares / pair_count - mean * mean, 0)),
+                min_efficiency=low,
+                max_efficiency=high,
+            )
+        )
+
+    results.sort(key=lambda r: (r.baseline_error, -r.exact_matches, r.efficiency_stdev))
+    return Sweep(baseline_multiplier, results)
+
+
+def format_sweep(sweep: Sweep, count: int = 10) -> str:
+    """Table of the best candidates, with the fitted baseline multiplier on top."""
+    rows: List[Tuple[str, ...]] = [
+        ("multiplier", "rounding", "floor", "cap", "error", "exact", "mean", "stdev")
+    ]
+    for r in sweep.best(count):
+        rows.append(
+            (
+                f"{r.params.multiplier:.4f}",
+                r.params.rounding,
+                str(r.params.floor),
+                "-" if r.params.cap is None else str(r.params.cap),
+                f"{r.baseline_error:.4f}",
+                str(r.exact_matches),
+                f"{r.mean_efficiency:.4f}",
+                f"{r.efficiency_stdev:.4f}",
+            )
+        )
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = [f"Fitted baseline multiplier: {sweep.baseline_multiplier:.4f}"]
+    lines += [
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows
+    ]
+    return "\n".join(lines)
+
+
+def _baseline_pairs(baseline: Sequence[Route], table: PairTable) -> Counter:
+    """Counts of (shortest distance, value) over the baseline's connected tickets."""
+    pairs = Counter()
+    for route in baseline:
+        distance = table.distance(route.a, route.b)
+        if distance != UNREACHABLE and distance > 0:
+            pairs[(distance, route.value)] += 1
+    return pairs
@@ -0,0 +1,225 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from multiprocessing.util import Finalize
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+from src.all_shortest_lines import single_source_dijkstra
+from src.data_types.distance_matrix import UNREACHABLE, DistanceMatrix
+from src.data_types.graph import Graph
+from src.data_types.pair_table import pair_id
+from src.data_types.route import Route
+from src.incremental_shortest_lines import sources_using_connection
+
+
+@dataclass(frozen=True, slots=True)
+class TrackCriticality:
+    """
+    What losing the connection between cities a < b (ids in the map) does to the
+    shortest lines. changes holds (x, y, old, new) with x < y for every pair whose
+    distance grows; new is UNREACHABLE for pairs the connection alone joined.
+    """
+
+    a: int
+    b: int
+    distance: int
+    tracks: int
+    changes: Tuple[Tuple[int, int, int, int], ...]
+
+    @property
+    def affected_pairs(self) -> int:
+        return len(self.changes)
+
+    @property
+    def disconnected_pairs(self) -> int:
+        return sum(new == UNREACHABLE for _, _, _, new in self.changes)
+
+    @property
+    def total_increase(self) -> int:
+        """Extra distance summed over the pairs that stay connected."""
+        return sum(new - old for _, _, old, new in self.changes if new != UNREACHABLE)
+
+    def affected_tickets(self, deck_pairs: Dict[int, int]) -> Tuple[int, int]:
+        """
+        (tickets whose line gets longer or is cut, extra distance over the ones that
+        stay connected) for a deck given as {pair_id: ticket count}, see deck_pairs.
+        """
+        tickets = increase = 0
+        for x, y, old, new in self.changes:
+            count = deck_pairs.get(pair_id(x, y), 0)
+            if count:
+                tickets += count
+                if new != UNREACHABLE:
+                    increase += (new - old) * count
+        return tickets, increase
+
+    def to_json(self, cities: Sequence[Hashable]) -> Dict:
+        return {
+            "a": cities[self.a].value,
+            "b": cities[self.b].value,
+            "distance": self.distance,
+            "tracks": self.tracks,
+            "affected_pairs": self.affected_pairs,
+            "disconnected_pairs": self.disconnected_pairs,
+            "total_increase": self.total_increase,
+            "changes": [
+                {
+                    "a": cities[x].value,
+                    "b": cities[y].value,
+                    "distance": old,
+                    "without_track": None if new == UNREACHABLE else new,
+                }
+                for x, y, old, new in self.changes
+            ],
+        }
+
+
+def track_criticality(
+    city_map: Graph,
+    matrix: DistanceMatrix,
+    workers: int | None = 1,
+) -> List[TrackCriticality]:
+    """
+    Remove each connection in turn and report the pairs whose shortest line grows,
+    in city_map.edges() order.
+
+    Only cities whose shortest line tree could use the connection are searched
+    again, on the map without it; every other row of matrix stays as it is. A
+    double connection is removed as a whole, so its report is what claiming both
+    tracks would do.
+    workers: Number of processes to share the connections between. None uses
+    every CPU core. The matrix is shared with them rather than copied to each.
+    """
+    edges = list(city_map.edges())
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(edges) <= 1:
+        return [
+            _connection_criticality(city_map, matrix.distances, i, j, distance)
+            for i, j, distance in edges
+        ]
+
+    raw = memoryview(matrix.distances).cast("B")
+    shm = shared_memory.SharedMemory(create=True, size=max(raw.nbytes, 1))
+    try:
+        shm.buf[: raw.nbytes] = raw
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_criticality_worker,
+            initargs=(shm.name, len(matrix.distances), city_map),
+        ) as executor:
+            chunksize = max(1, len(edges) // (workers * 4))
+            return list(
+                executor.map(_criticality_worker_task, edges, chunksize=chunksize)
+            )
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def deck_pairs(deck: Sequence[Route], city_map: Graph) -> Dict[int, int]:
+    """{pair_id: number of tickets} for the tickets of a deck."""
+    pairs: Dict[int, int] = {}
+    index = city_map.index
+    for route in deck:
+        i, j = index[route.a], index[route.b]
+        if i != j:
+            k = pair_id(i, j)
+            pairs[k] = pairs.get(k, 0) + 1
+    return pairs
+
+
+def format_criticality(
+    reports: Sequence[TrackCriticality],
+    cities: Sequence[Hashable],
+    deck: Dict[int, int] | None = None,
+    count: int = 20,
+) -> str:
+    """
+    The most critical connections: by tickets affected when a deck is given (see
+    deck_pairs), otherwise by city pairs affected, then by extra distance.
+    """
+    rows: List[Tuple[str, ...]] = [
+        ("track", "length", "tracks", "pairs", "cut", "extra")
+    ]
+    if deck is not None:
+        rows[0] += ("tickets", "ticket extra")
+        scored = [(report, report.affected_tickets(deck)) for report in reports]
+        scored.sort(key=lambda s: (s[1], s[0].affected_pairs), reverse=True)
+    else:
+        scored = [(report, None) for report in reports]
+        scored.sort(
+            key=lambda s: (s[0].affected_pairs, s[0].total_increase), reverse=True
+        )
+
+    for report, tickets in scored[:count]:
+        row = (
+            f"{cities[report.a].value} - {cities[report.b].value}",
+            str(report.distance),
+            str(report.tracks),
+            str(report.affected_pairs),
+            str(report.disconnected_pairs),
+            str(report.total_increase),
+        )
+        if tickets is not None:
+            row += tuple(str(value) for value in tickets)
+        rows.append(row)
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    )
+
+
+def _connection_criticality(
+    city_map: Graph, distances: Sequence[int], i: int, j: int, distance: int
+) -> TrackCriticality:
+    n = len(city_map)
+    tracks = city_map.tracks[city_map.edge_slot(i, j)]
+    without = city_map.with_connection(i, j, None)
+    changes = []
+    # A pair that gets longer has the connection on every shortest line between
+    # them, so both of its cities are sources; it is recorded from the lower one
+    for x in sources_using_connection(distances, n, i, j, distance):
+        dist, _ = single_source_dijkstra(x, without)
+        base = x * n
+        for y in range(x + 1, n):
+            old = distances[base + y]
+            if dist[y] != old:
+                changes.append((x, y, old, dist[y]))
+    return TrackCriticality(i, j, distance, tracks, tuple(changes))
+
+
+_worker_state: dict = {}
+
+
+def _init_criticality_worker(shm_name: str, size: int, city_map: Graph) -> None:
+    """Attach to the shared distance matrix once per worker process."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state["shm"] = shm
+    _worker_state["distances"] = shm.buf.cast("i")[:size]
+    _worker_state["city_map"] = city_map
+    # As for render workers: atexit handlers do not run in forked pool workers
+    Finalize(None, _close_criticality_worker, exitpriority=0)
+
+
+def _close_criticality_worker() -> None:
+    """Release the view into the shared matrix, then detach from it."""
+    distances = _worker_state.pop("distances", None)
+    if distances is not None:
+        distances.release()
+    shm = _worker_state.pop("shm", None)
+    if shm is not None:
+        shm.close()
+
+
+def _criticality_worker_task(edge: Tuple[int, int, int]) -> TrackCriticality:
+    return _connection_criticality(
+        _worker_state["city_map"], _worker_state["distances"], *edge
+    )